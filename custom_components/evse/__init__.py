@@ -1,13 +1,249 @@
+import asyncio
+import os
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers import device_registry as dr
-from .const import DOMAIN, PLATFORMS
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .allocation import MODE_FAIR_SHARE, MODE_PRIORITY
+from .const import (
+    DATA_FLEET,
+    DATA_LOAD_MANAGER,
+    DOMAIN,
+    LOG_STORAGE_KEY,
+    LOG_STORAGE_VERSION,
+    MIN_CHARGING_CURRENT,
+    PLATFORMS,
+    SCHEDULE_STORAGE_KEY,
+    SCHEDULE_STORAGE_VERSION,
+    SERVICE_CONFIGURE_LOAD_BALANCING,
+    SERVICE_GET_FLEET_METRICS,
+    SERVICE_GET_SESSION_REPORT,
+    SERVICE_SET_CHARGING_SCHEDULE,
+    SERVICE_SET_CURRENT_BULK,
+    SERVICE_SET_STATUS_BULK,
+    SESSION_DIR,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .commands import COMMAND_SET_CURRENT, COMMAND_SET_STATUS
+from .coordinator import EVSEDataUpdateCoordinator
+from .discovery import read_arp_table
+from .fleet import EVSEFleet
+from .load_manager import EVSELoadManager
+from .planner import MODE_PRICE, MODE_SURPLUS
+from .sessions import aggregate
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+LOAD_BALANCING_SCHEMA = vol.Schema({
+    vol.Optional('enabled'): cv.boolean,
+    vol.Optional('supply_current'): vol.All(vol.Coerce(float), vol.Range(min=MIN_CHARGING_CURRENT)),
+    vol.Optional('meter_entity'): vol.Any(None, cv.entity_id),
+    vol.Optional('mode'): vol.In([MODE_FAIR_SHARE, MODE_PRIORITY]),
+})
+
+SESSION_REPORT_SCHEMA = vol.Schema({
+    vol.Optional('start'): cv.datetime,
+    vol.Optional('end'): cv.datetime,
+    vol.Optional('rfid_uid'): cv.string,
+    vol.Optional('include_sessions', default=False): cv.boolean,
+})
+
+CHARGING_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Required('config_entry_id'): cv.string,
+    vol.Optional('enabled'): cv.boolean,
+    vol.Optional('mode'): vol.In([MODE_PRICE, MODE_SURPLUS]),
+    vol.Optional('forecast_entity'): vol.Any(None, cv.entity_id),
+    vol.Optional('energy'): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional('deadline'): cv.datetime,
+    vol.Optional('phases'): vol.All(vol.Coerce(int), vol.Range(min=1, max=3)),
+})
+
+BULK_TARGET_SCHEMA = {
+    vol.Optional('device_id'): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional('config_entry_id'): vol.All(cv.ensure_list, [cv.string]),
+}
+
+SET_CURRENT_BULK_SCHEMA = vol.Schema({
+    **BULK_TARGET_SCHEMA,
+    vol.Required('current'): vol.All(vol.Coerce(int), vol.Range(min=MIN_CHARGING_CURRENT, max=32)),
+})
+
+SET_STATUS_BULK_SCHEMA = vol.Schema({
+    **BULK_TARGET_SCHEMA,
+    vol.Required('active'): cv.boolean,
+})
+
+def _bulk_targets(hass: HomeAssistant, fleet, call: ServiceCall):
+    """Return the loaded chargers a bulk call targets, all of them if none is given."""
+    entry_ids = list(call.data.get('config_entry_id', []))
+    device_registry = dr.async_get(hass)
+    for device_id in call.data.get('device_id', []):
+        if (device := device_registry.async_get(device_id)) is None:
+            raise HomeAssistantError(f"Unknown device {device_id}")
+        # The MAC connection can merge the device with ones of other integrations
+        chargers = [entry_id for entry_id in device.config_entries if entry_id in fleet.coordinators]
+        if not chargers:
+            raise HomeAssistantError(f"Device {device_id} is no loaded EVSE charger")
+        entry_ids += chargers
+    if 'config_entry_id' not in call.data and 'device_id' not in call.data:
+        return list(fleet.coordinators)
+    unknown = [entry_id for entry_id in entry_ids if entry_id not in fleet.coordinators]
+    if unknown:
+        raise HomeAssistantError(f"No loaded EVSE charger with config entry {', '.join(unknown)}")
+    return list(dict.fromkeys(entry_ids))
+
+async def async_setup(hass: HomeAssistant, config):
+    """Set up the domain wide fleet scheduler and services."""
+    fleet = EVSEFleet(hass)
+    load_manager = EVSELoadManager(hass, fleet)
+    hass.data.setdefault(DOMAIN, {})[DATA_FLEET] = fleet
+    hass.data[DOMAIN][DATA_LOAD_MANAGER] = load_manager
+    await load_manager.async_load()
+
+    @callback
+    def async_stop_fleet(event):
+        """Cancel the pending timers when Home Assistant stops."""
+        load_manager.async_shutdown()
+        fleet.async_shutdown()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_fleet)
+
+    async def async_get_fleet_metrics(call: ServiceCall):
+        """Return poll rate, latency percentiles and failures per charger."""
+        return fleet.metrics()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_FLEET_METRICS, async_get_fleet_metrics, supports_response=SupportsResponse.ONLY
+    )
+
+    async def async_configure_load_balancing(call: ServiceCall):
+        """Update the shared supply settings and return the allocation."""
+        await load_manager.async_configure(**call.data)
+        return load_manager.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CONFIGURE_LOAD_BALANCING,
+        async_configure_load_balancing,
+        schema=LOAD_BALANCING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_get_session_report(call: ServiceCall):
+        """Return charging sessions per user, e.g. for a monthly bill."""
+        start = call.data.get('start')
+        end = call.data.get('end')
+        start = dt_util.as_utc(start).timestamp() if start else None
+        end = dt_util.as_utc(end).timestamp() if end else None
+        chargers = {}
+        all_sessions = []
+        for entry_id, coordinator in fleet.coordinators.items():
+            sessions = coordinator.sessions.sessions(start, end, call.data.get('rfid_uid'))
+            all_sessions.extend(sessions)
+            chargers[entry_id] = {"name": coordinator.sessions.name, **aggregate(sessions)}
+            if call.data['include_sessions']:
+                chargers[entry_id]["session_list"] = [session.as_dict() for session in sessions]
+        return {**aggregate(all_sessions), "chargers": chargers}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SESSION_REPORT,
+        async_get_session_report,
+        schema=SESSION_REPORT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_set_charging_schedule(call: ServiceCall):
+        """Configure the charging schedule of one charger and return its plan."""
+        changes = dict(call.data)
+        entry_id = changes.pop('config_entry_id')
+        if (coordinator := fleet.coordinators.get(entry_id)) is None:
+            raise HomeAssistantError(f"No loaded EVSE charger with config entry {entry_id}")
+        scheduler = coordinator.scheduler
+        if changes.get('enabled') and changes.get('deadline', scheduler.config['deadline']) is None:
+            raise HomeAssistantError("A charging schedule needs a deadline")
+        await scheduler.async_configure(**changes)
+        return scheduler.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CHARGING_SCHEDULE,
+        async_set_charging_schedule,
+        schema=CHARGING_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_send_bulk(call: ServiceCall, kind, value):
+        """Send a command to the targeted chargers at once and sum up the outcome."""
+        entry_ids = _bulk_targets(hass, fleet, call)
+        if kind == COMMAND_SET_STATUS:
+            # E.g. a curtailment, which load balancing must not undo
+            await load_manager.async_set_user_enabled(entry_ids, value)
+        results = await fleet.async_send_bulk(entry_ids, kind, value)
+        succeeded = sum(1 for result in results.values() if result["success"])
+        return {"succeeded": succeeded, "failed": len(results) - succeeded, "chargers": results}
+
+    async def async_set_current_bulk(call: ServiceCall):
+        """Set the charging current of many chargers at once."""
+        return await async_send_bulk(call, COMMAND_SET_CURRENT, call.data['current'])
+
+    async def async_set_status_bulk(call: ServiceCall):
+        """Activate or deactivate many chargers at once."""
+        return await async_send_bulk(call, COMMAND_SET_STATUS, call.data['active'])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CURRENT_BULK,
+        async_set_current_bulk,
+        schema=SET_CURRENT_BULK_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_STATUS_BULK,
+        async_set_status_bulk,
+        schema=SET_STATUS_BULK_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     """Set up EVSE integration from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][config_entry.entry_id] = config_entry.data
+    fleet = hass.data[DOMAIN][DATA_FLEET]
+
+    # The stored snapshot of the last run is the first snapshot of every
+    # platform and is refreshed in the background. Only a charger without
+    # one needs a probe of /getParameters before its entities exist.
+    coordinator = EVSEDataUpdateCoordinator(hass, config_entry, fleet)
+    try:
+        restored, _ = await asyncio.gather(coordinator.async_restore(), coordinator.sessions.async_load())
+        if not restored:
+            await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        await coordinator.client.close()
+        raise
+    hass.data[DOMAIN][config_entry.entry_id] = coordinator
+    fleet.async_add(coordinator)
+    if restored:
+        fleet.async_poll_now(config_entry.entry_id)
+    await coordinator.log_importer.async_load()
+    await coordinator.scheduler.async_load()
+    if coordinator.push is not None:
+        coordinator.push.start()
+    if 'mac' not in config_entry.data and (mac := (await hass.async_add_executor_job(read_arp_table)).get(coordinator.ip)):
+        # Entries added by address learn the MAC for DHCP discovery, before
+        # the update listener exists so this does not reload the entry
+        hass.config_entries.async_update_entry(config_entry, data={**config_entry.data, 'mac': mac})
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
 
     # Create a device entry
 #    device_registry = dr.async_get(hass)
@@ -23,10 +259,35 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
 
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DOMAIN][DATA_FLEET].async_remove(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
 
     return unload_ok
+
+def _remove_file(path):
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Delete the stored data of a removed charger."""
+    for key, version in (
+        (SNAPSHOT_STORAGE_KEY, SNAPSHOT_STORAGE_VERSION),
+        (SCHEDULE_STORAGE_KEY, SCHEDULE_STORAGE_VERSION),
+        (LOG_STORAGE_KEY, LOG_STORAGE_VERSION),
+    ):
+        await Store(hass, version, f"{key}.{entry.entry_id}").async_remove()
+    await hass.async_add_executor_job(_remove_file, hass.config.path(SESSION_DIR, f"{entry.entry_id}.bin"))
+    if (load_manager := hass.data.get(DOMAIN, {}).get(DATA_LOAD_MANAGER)) is not None:
+        await load_manager.async_forget(entry.entry_id)
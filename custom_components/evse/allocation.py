@@ -0,0 +1,87 @@
+"""Current allocation for chargers sharing one supply."""
+from dataclasses import dataclass
+
+from .const import MIN_CHARGING_CURRENT
+
+MODE_FAIR_SHARE = "fair_share"
+MODE_PRIORITY = "priority"
+
+
+@dataclass(slots=True)
+class ChargerDemand:
+    """What the allocator needs to know about one charger."""
+
+    entry_id: str
+    max_current: int
+    priority: int = 0
+    charging: bool = False
+
+
+def _selected(chargers, available):
+    """Return the chargers that can get at least the minimum current.
+
+    If the supply cannot give every charger the minimum, the ones with the
+    highest priority win and chargers that are already charging are kept
+    before new ones so the allocation does not churn.
+    """
+    slots = int(available // MIN_CHARGING_CURRENT)
+    if slots >= len(chargers):
+        return list(chargers)
+    ranked = sorted(chargers, key=lambda c: (-c.priority, not c.charging, c.entry_id))
+    return ranked[:max(slots, 0)]
+
+
+def _water_fill(chargers, available):
+    """Split available evenly, capping each charger at its max_current."""
+    allocation = {}
+    remaining = available
+    ordered = sorted(chargers, key=lambda c: c.max_current)
+    for index, charger in enumerate(ordered):
+        share = remaining / (len(ordered) - index)
+        current = min(charger.max_current, share)
+        allocation[charger.entry_id] = current
+        remaining -= current
+    return allocation
+
+
+def _priority_fill(chargers, available):
+    """Give every charger the minimum, then the surplus by priority."""
+    allocation = {c.entry_id: MIN_CHARGING_CURRENT for c in chargers}
+    remaining = available - MIN_CHARGING_CURRENT * len(chargers)
+    for charger in sorted(chargers, key=lambda c: (-c.priority, c.entry_id)):
+        extra = min(charger.max_current - MIN_CHARGING_CURRENT, remaining)
+        allocation[charger.entry_id] += extra
+        remaining -= extra
+    return allocation
+
+
+def allocate(chargers, available, mode=MODE_FAIR_SHARE):
+    """Return the current limit in whole ampere for every charger.
+
+    Chargers that cannot be given the minimum charging current get 0 and
+    should be paused. Runs in O(n log n), so a hundred chargers take well
+    below a millisecond.
+    """
+    chargers = [c for c in chargers if c.max_current >= MIN_CHARGING_CURRENT]
+    allocation = dict.fromkeys((c.entry_id for c in chargers), 0)
+    selected = _selected(chargers, available)
+    if not selected:
+        return allocation
+
+    if mode == MODE_PRIORITY:
+        shares = _priority_fill(selected, available)
+    else:
+        shares = _water_fill(selected, available)
+
+    # Round down to whole ampere, then hand out the leftover ampere one by one
+    maximum = {c.entry_id: c.max_current for c in selected}
+    leftover = int(available - sum(int(share) for share in shares.values()))
+    for entry_id, share in shares.items():
+        allocation[entry_id] = int(share)
+    for entry_id in sorted(shares, key=lambda e: shares[e] - int(shares[e]), reverse=True):
+        if leftover <= 0:
+            break
+        if allocation[entry_id] < maximum[entry_id]:
+            allocation[entry_id] += 1
+            leftover -= 1
+    return allocation
@@ -0,0 +1,137 @@
+"""Rolling per-phase power quality figures computed from each snapshot."""
+import math
+from collections import deque
+
+from .const import ACTIVE_PHASE_CURRENT, ANALYTICS_WINDOW
+
+PHASES = (1, 2, 3)
+
+# Derived keys with the number of decimals they are rounded to, which is
+# also the resolution a change has to reach before the sensor writes.
+# activePhases is text like "L1,L3", or "none" if no phase draws.
+ANALYTICS_DIGITS = {
+    "phaseImbalance": 1,
+    "activePhases": None,
+    **{f"apparentPowerP{phase}": 2 for phase in PHASES},
+    **{f"currentRmsP{phase}": 2 for phase in PHASES},
+    **{f"currentPeakP{phase}": 1 for phase in PHASES},
+}
+ANALYTICS_KEYS = frozenset(ANALYTICS_DIGITS)
+
+
+class RollingWindow:
+    """Mean, RMS and maximum of the samples of the last ``length`` seconds.
+
+    Running sums give mean and RMS, a deque of decreasing values gives the
+    maximum. Every sample is appended and evicted once, so adding is O(1)
+    amortized and reading is O(1).
+    """
+
+    __slots__ = ("length", "_samples", "_peaks", "_sum", "_squares")
+
+    def __init__(self, length):
+        """Initialize an empty window."""
+        self.length = length
+        self._samples = deque()
+        self._peaks = deque()
+        self._sum = 0.0
+        self._squares = 0.0
+
+    def add(self, now, value):
+        """Add a sample taken at now and drop the ones that left the window."""
+        self._samples.append((now, value))
+        self._sum += value
+        self._squares += value * value
+        while self._peaks and self._peaks[-1][1] <= value:
+            self._peaks.pop()
+        self._peaks.append((now, value))
+        self.evict(now)
+
+    def evict(self, now):
+        """Drop the samples older than the window."""
+        horizon = now - self.length
+        while self._samples and self._samples[0][0] < horizon:
+            _, value = self._samples.popleft()
+            self._sum -= value
+            self._squares -= value * value
+        if not self._samples:
+            # Start again from exact zeros instead of accumulated rounding
+            self._sum = self._squares = 0.0
+        while self._peaks and self._peaks[0][0] < horizon:
+            self._peaks.popleft()
+
+    @property
+    def mean(self):
+        """Return the mean, None for an empty window."""
+        return self._sum / len(self._samples) if self._samples else None
+
+    @property
+    def rms(self):
+        """Return the root mean square, None for an empty window."""
+        return math.sqrt(max(self._squares, 0.0) / len(self._samples)) if self._samples else None
+
+    @property
+    def peak(self):
+        """Return the maximum, None for an empty window."""
+        return self._peaks[0][1] if self._peaks else None
+
+
+def phase_imbalance(currents):
+    """Return the largest deviation from the mean phase current in percent.
+
+    None if a phase current is missing or the car draws (almost) nothing,
+    where the ratio would be noise.
+    """
+    if None in currents:
+        return None
+    mean = sum(currents) / len(currents)
+    if mean < ACTIVE_PHASE_CURRENT:
+        return None
+    return max(abs(current - mean) for current in currents) / mean * 100
+
+
+class PhaseAnalytics:
+    """Derived per-phase figures of one charger, updated from every snapshot."""
+
+    def __init__(self, window=ANALYTICS_WINDOW):
+        """Initialize empty rolling windows."""
+        self.currents = {phase: RollingWindow(window) for phase in PHASES}
+        self.values = dict.fromkeys(ANALYTICS_KEYS)
+
+    def update(self, now, data):
+        """Feed a snapshot taken at now and return the derived keys whose value changed."""
+        currents = [getattr(data, f"current_p{phase}") for phase in PHASES]
+        voltages = [getattr(data, f"voltage_p{phase}") for phase in PHASES]
+        values = {"phaseImbalance": phase_imbalance(currents)}
+        active = []
+        for phase, current, voltage in zip(PHASES, currents, voltages):
+            window = self.currents[phase]
+            if current is not None:
+                window.add(now, current)
+            else:
+                window.evict(now)
+            values[f"apparentPowerP{phase}"] = (
+                None if current is None or voltage is None else voltage * current / 1000
+            )
+            values[f"currentRmsP{phase}"] = window.rms
+            values[f"currentPeakP{phase}"] = window.peak
+            # The rolling mean keeps a phase from flickering at the threshold
+            if window.mean is not None and window.mean >= ACTIVE_PHASE_CURRENT:
+                active.append(f"L{phase}")
+        if any(current is not None for current in currents):
+            values["activePhases"] = ",".join(active) or "none"
+        else:
+            values["activePhases"] = None
+
+        changed = set()
+        for key, value in values.items():
+            if value is not None and ANALYTICS_DIGITS[key] is not None:
+                value = round(value, ANALYTICS_DIGITS[key])
+            if value != self.values[key]:
+                self.values[key] = value
+                changed.add(key)
+        return changed
+
+    def as_dict(self):
+        """Return the latest derived values."""
+        return dict(self.values)
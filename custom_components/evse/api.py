@@ -0,0 +1,290 @@
+"""HTTP client for the SimpleEVSE-WiFi controller API."""
+import asyncio
+import codecs
+import json
+import time
+
+import aiohttp
+
+from .const import (
+    KEEPALIVE_TIMEOUT,
+    LOG_CHUNK_SIZE,
+    LOG_TIMEOUT,
+    MAX_CONNECTIONS_PER_HOST,
+    REQUEST_TIMEOUT,
+    WS_HEARTBEAT,
+)
+from .metrics import ERROR_CONNECTION, ERROR_HTTP, ERROR_INVALID, ERROR_TIMEOUT
+from .models import EVSEParameters
+
+# Outcome of a request that was cancelled before it finished
+_ABORTED = object()
+
+# Keys of the firmware's "getevsedata" WebSocket message and the
+# /getParameters keys they carry the same value as.
+WS_PARAMETER_KEYS = {
+    "evse_vehicle_state": "vehicleState",
+    "evse_active": "evseState",
+    "evse_current_limit": "actualCurrent",
+    "evse_current": "actualPower",
+    "evse_charging_time": "duration",
+    "evse_always_active": "alwaysActive",
+    "evse_charged_kwh": "energy",
+    "evse_charged_mileage": "mileage",
+    "evse_maximum_current": "maxCurrent",
+    "evse_meter_reading": "meterReading",
+    "evse_current_p1": "currentP1",
+    "evse_current_p2": "currentP2",
+    "evse_current_p3": "currentP3",
+    "evse_voltage_p1": "voltageP1",
+    "evse_voltage_p2": "voltageP2",
+    "evse_voltage_p3": "voltageP3",
+}
+
+
+class EVSEError(Exception):
+    """Base error raised by the EVSE client."""
+
+
+class EVSEConnectionError(EVSEError):
+    """The controller could not be reached or returned an HTTP error."""
+
+
+class EVSETimeoutError(EVSEConnectionError):
+    """The controller did not answer in time."""
+
+
+class EVSECommandError(EVSEError):
+    """The controller rejected a command with an E0_..E3_ response."""
+
+    def __init__(self, response_text):
+        """Initialize the error from the raw controller response."""
+        super().__init__(response_text)
+        self.response_text = response_text
+        # E0 internal error, E1 invalid value, E2 wrong parameter, E3 unchanged
+        prefix = response_text[:3]
+        self.code = prefix[:2] if prefix in ("E0_", "E1_", "E2_", "E3_") else None
+
+
+def parse_command_response(response_text):
+    """Return the text of an S0_ response or raise EVSECommandError."""
+    if response_text.startswith("S0_"):
+        return response_text
+    raise EVSECommandError(response_text)
+
+
+def _ws_value(value):
+    """Return numbers sent as strings over the WebSocket as numbers."""
+    if isinstance(value, str):
+        try:
+            return float(value) if "." in value else int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def decode_ws_frame(message):
+    """Decode a WebSocket message into a partial /getParameters dict.
+
+    Both a full "parameters" document and the firmware's "getevsedata"
+    status message are understood, anything else decodes to an empty dict.
+    """
+    if not isinstance(message, dict):
+        return {}
+    if message.get("type") == "parameters" and message.get("list"):
+        return dict(message["list"][0])
+    if message.get("command") == "getevsedata":
+        return {
+            WS_PARAMETER_KEYS[key]: _ws_value(value)
+            for key, value in message.items()
+            if key in WS_PARAMETER_KEYS
+        }
+    return {}
+
+
+class LogStreamDecoder:
+    """Decode the records of a /getLog response while it is downloaded.
+
+    The controller answers with one document of the form
+    ``{"type": "latestlog", "list": [{...}, {...}]}``. Instead of buffering
+    the whole log, every chunk is appended to a small buffer and each record
+    of the list is decoded as soon as its closing brace has arrived.
+    """
+
+    def __init__(self):
+        """Initialize the decoder."""
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._in_list = False
+        self.done = False
+
+    def feed(self, chunk):
+        """Decode a chunk of the response and return the completed records."""
+        if self.done:
+            return []
+        buffer = self._buffer + self._text.decode(chunk)
+        pos = 0
+        if not self._in_list:
+            key = buffer.find('"list"')
+            bracket = buffer.find("[", key) if key >= 0 else -1
+            if bracket < 0:
+                self._buffer = buffer
+                return []
+            self._in_list = True
+            pos = bracket + 1
+
+        records = []
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                break
+            try:
+                record, pos = self._json.raw_decode(buffer, pos)
+            except ValueError:
+                # The record is not complete yet
+                break
+            if isinstance(record, dict):
+                records.append(record)
+        self._buffer = "" if self.done else buffer[pos:]
+        return records
+
+
+class EVSEClient:
+    """Single place where the integration talks HTTP to one controller.
+
+    The client owns a pooled session and lets only a couple of requests run
+    at once, which is what the ESP8266 web server on the controller copes
+    with. Inside Home Assistant the session comes from session_factory, so
+    Home Assistant tracks it; without one, e.g. in the tools, the client
+    makes a plain aiohttp session with keep-alive connections.
+    """
+
+    def __init__(self, host, port, session=None, metrics=None, session_factory=None):
+        """Initialize the client, recording into a ChargerMetrics if given."""
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self._base_url = f"http://{host}:{port}"
+        self._session = session
+        self._owns_session = session is None
+        self._session_factory = session_factory
+        self._slots = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+
+    def _get_session(self):
+        """Return the pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            if self._session_factory is not None:
+                self._session = self._session_factory()
+            else:
+                connector = aiohttp.TCPConnector(
+                    limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                    keepalive_timeout=KEEPALIVE_TIMEOUT,
+                )
+                self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    def url(self, path):
+        """Return the full URL for an API path."""
+        return f"{self._base_url}/{path}"
+
+    def _record_error(self, code):
+        """Count an error in the metrics, if any."""
+        if self.metrics is not None:
+            self.metrics.record_error(code)
+
+    async def _request(self, path, params=None, json=False, timeout=REQUEST_TIMEOUT):
+        """Perform a GET request and return the decoded body."""
+        url = self.url(path)
+        start = time.monotonic()
+        error = _ABORTED
+        try:
+            async with self._slots, asyncio.timeout(timeout):
+                async with self._get_session().get(url, params=params) as response:
+                    if response.status != 200:
+                        error = ERROR_HTTP
+                        raise EVSEConnectionError(f"Error fetching data from {url}: HTTP status {response.status}")
+                    if json:
+                        body = await response.json(content_type=None)
+                    else:
+                        body = await response.text()
+            error = None
+        except asyncio.TimeoutError as e:
+            error = ERROR_TIMEOUT
+            raise EVSETimeoutError(f"Timeout error for {url}") from e
+        except aiohttp.ClientError as e:
+            error = ERROR_CONNECTION
+            raise EVSEConnectionError(f"Connection error for {url}: {e}") from e
+        except ValueError as e:
+            error = ERROR_INVALID
+            raise EVSEError(f"Invalid response from {url}: {e}") from e
+        finally:
+            if self.metrics is not None and error is not _ABORTED:
+                self.metrics.record_request(path, time.monotonic() - start, error)
+        return body
+
+    def _parse_command(self, response_text):
+        """Return the text of an S0_ response, counting E0_..E3_ errors."""
+        try:
+            return parse_command_response(response_text)
+        except EVSECommandError as e:
+            self._record_error(e.code or ERROR_INVALID)
+            raise
+
+    async def get_parameters(self, timeout=REQUEST_TIMEOUT):
+        """Return the parsed snapshot from /getParameters."""
+        data = await self._request("getParameters", json=True, timeout=timeout)
+        if not isinstance(data, dict) or data.get("type") != "parameters" or not data.get("list"):
+            self._record_error(ERROR_INVALID)
+            raise EVSEError(f"Unexpected data format from {self.url('getParameters')}")
+        start = time.monotonic()
+        params = EVSEParameters.from_dict(data["list"][0])
+        if self.metrics is not None:
+            self.metrics.record_parse(time.monotonic() - start)
+        return params
+
+    async def iter_log(self):
+        """Yield the records of the on-device charging log as they arrive."""
+        url = self.url("getLog")
+        decoder = LogStreamDecoder()
+        try:
+            async with self._slots, asyncio.timeout(LOG_TIMEOUT):
+                async with self._get_session().get(url) as response:
+                    if response.status != 200:
+                        raise EVSEConnectionError(f"Error fetching data from {url}: HTTP status {response.status}")
+                    async for chunk in response.content.iter_chunked(LOG_CHUNK_SIZE):
+                        for record in decoder.feed(chunk):
+                            yield record
+        except asyncio.TimeoutError as e:
+            raise EVSETimeoutError(f"Timeout error for {url}") from e
+        except aiohttp.ClientError as e:
+            raise EVSEConnectionError(f"Connection error for {url}: {e}") from e
+        if not decoder.done:
+            raise EVSEError(f"Unexpected data format from {url}")
+
+    async def set_current(self, current):
+        """Set the charging current in ampere and return the S0_ response."""
+        return self._parse_command(await self._request("setCurrent", {"current": int(current)}))
+
+    async def set_status(self, active):
+        """Activate or deactivate charging and return the S0_ response."""
+        return self._parse_command(await self._request("setStatus", {"active": "true" if active else "false"}))
+
+    async def ws_connect(self):
+        """Open the status WebSocket of the controller."""
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                return await self._get_session().ws_connect(self.url("ws"), heartbeat=WS_HEARTBEAT)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise EVSEConnectionError(f"Connection error for {self.url('ws')}: {e}") from e
+
+    async def close(self):
+        """Close the session if the client created it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
@@ -1,64 +1,46 @@
 from homeassistant.components.binary_sensor import BinarySensorEntity
-import aiohttp
-import async_timeout
 
 from .const import DOMAIN
+from .entity import EVSEEntity
+from .models import PARAMETER_FIELDS
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the EVSE binary sensors."""
-    ip = config_entry.data['ip_address']
-    port = config_entry.data['port']
     name = config_entry.data['name']
     entry_id = config_entry.entry_id
     unique_id = config_entry.unique_id
+    coordinator = hass.data[DOMAIN][entry_id]
 
     sensors = [
-        EVSEBinarySensor(f"{name}_evse_state", ip, port, "evseState", "EVSE State", entry_id, unique_id)
+        EVSEBinarySensor(coordinator, f"{name}_evse_state", "evseState", "EVSE State", entry_id, unique_id)
     ]
 
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
 
-class EVSEBinarySensor(BinarySensorEntity):
+class EVSEBinarySensor(EVSEEntity, BinarySensorEntity):
     """Representation of an EVSE binary sensor."""
 
-    def __init__(self, name, ip, port, attribute, friendly_name, entry_id, unique_id):
+    def __init__(self, coordinator, name, attribute, friendly_name, entry_id, unique_id):
         """Initialize the binary sensor."""
+        super().__init__(coordinator, entry_id)
         self._name = name
-        self._ip = ip
-        self._port = port
         self._attribute = attribute
         self._friendly_name = friendly_name
-        self._state = None
+        self._field = PARAMETER_FIELDS[attribute]
+        self._state = getattr(coordinator.data, self._field)
         self._attr_unique_id = f"{unique_id}_{self._attribute}"
-        self._entry_id = entry_id
+        self._watched_keys = (attribute,)
 
     @property
     def name(self):
         """Return the name of the sensor."""
         return self._name
 
-    @property
-    def device_info(self):
-        """Return device information."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-        }
-
     @property
     def is_on(self):
         """Return true if the sensor is on."""
-        return self._state == "1"
+        return bool(self._state)
 
-    async def async_update(self):
-        """Fetch new state data for the sensor."""
-        url = f"http://{self._ip}:{self._port}/getParameters"
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with async_timeout.timeout(10):
-                    async with session.get(url) as response:
-                        data = await response.json()
-                        self._state = data["list"][0].get(self._attribute)
-        except Exception as e:
-            self._state = None
-            # Log the error in the Home Assistant log
-            self.hass.components.logger.error(f"Error fetching data from {url}: {e}")
+    def _update_from_data(self, data):
+        """Take the attribute from the shared parameter snapshot."""
+        self._state = getattr(data, self._field)
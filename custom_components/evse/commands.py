@@ -0,0 +1,192 @@
+"""Serialized, coalescing command queue for one controller."""
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import COMMAND_CONFIRM_TIMEOUT, COMMAND_MIN_INTERVAL
+from .models import PARAMETER_FIELDS
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_SET_CURRENT = "setCurrent"
+COMMAND_SET_STATUS = "setStatus"
+
+# Snapshot key each command is expected to change
+COMMAND_KEYS = {COMMAND_SET_CURRENT: "actualCurrent", COMMAND_SET_STATUS: "evseState"}
+
+
+class _Command:
+    """A queued command and the future all its callers wait on."""
+
+    __slots__ = ("kind", "value", "future")
+
+    def __init__(self, kind, value, future):
+        """Initialize the command."""
+        self.kind = kind
+        self.value = value
+        self.future = future
+
+
+def _consume_exception(future):
+    """Mark a failed future as seen when every caller has gone away."""
+    if not future.cancelled():
+        future.exception()
+
+
+class CommandTracker:
+    """Expected snapshot values of the commands the controller accepted.
+
+    Entities show an expected value instead of the snapshot's until a
+    snapshot confirms it. If none does within ``timeout`` seconds the value
+    is rolled back to the snapshot's, so the state is accurate without an
+    extra fetch per command. One timer covers all pending values.
+    """
+
+    def __init__(self, hass: HomeAssistant, on_change, timeout=COMMAND_CONFIRM_TIMEOUT):
+        """Initialize the tracker, on_change is called with the keys whose shown value changed."""
+        self.hass = hass
+        self.timeout = timeout
+        self._on_change = on_change
+        self._pending = {}
+        self._unsub_timer = None
+
+    def value(self, key, data):
+        """Return the expected value of a snapshot key, or the snapshot's own."""
+        if key in self._pending:
+            return self._pending[key][0]
+        return getattr(data, PARAMETER_FIELDS[key]) if data is not None else None
+
+    def pending(self, key):
+        """Return True while a value of the key waits for confirmation."""
+        return key in self._pending
+
+    @callback
+    def expect(self, key, value):
+        """Show value for a snapshot key until a snapshot confirms it."""
+        self._pending[key] = (value, time.monotonic() + self.timeout)
+        self._schedule()
+        self._on_change({key})
+
+    @callback
+    def async_update(self, data):
+        """Drop the pending values the snapshot confirms."""
+        for key, (value, _deadline) in list(self._pending.items()):
+            if getattr(data, PARAMETER_FIELDS[key]) == value:
+                _LOGGER.debug(f"{key}={value} confirmed")
+                del self._pending[key]
+        self._schedule()
+
+    def _schedule(self):
+        """Wake up when the oldest pending value runs out."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._pending:
+            deadline = min(deadline for _value, deadline in self._pending.values())
+            self._unsub_timer = async_call_later(
+                self.hass, max(deadline - time.monotonic(), 0), self._async_expire
+            )
+
+    @callback
+    def _async_expire(self, _now):
+        """Roll back the values no snapshot confirmed in time."""
+        self._unsub_timer = None
+        now = time.monotonic()
+        expired = {key for key, (_value, deadline) in self._pending.items() if deadline <= now}
+        for key in expired:
+            _LOGGER.warning(f"{key}={self._pending.pop(key)[0]} was not confirmed, showing the polled value")
+        self._schedule()
+        if expired:
+            self._on_change(expired)
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the timer and forget the pending values."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._pending.clear()
+
+
+class EVSECommandQueue:
+    """Send setCurrent and setStatus to one controller one at a time.
+
+    A command that is still waiting in the queue absorbs a newer command of
+    the same kind, so a burst of slider moves becomes a single request with
+    the latest value. All callers of the absorbed commands get the outcome
+    of that request. Requests are spaced at least ``min_interval`` apart.
+    Accepted commands are handed to the tracker, if there is one.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, tracker=None, min_interval=COMMAND_MIN_INTERVAL):
+        """Initialize the queue."""
+        self.hass = hass
+        self.client = client
+        self.tracker = tracker
+        self.min_interval = min_interval
+        self._pending = []
+        self._worker = None
+        self._last_sent = 0.0
+
+    async def set_current(self, current):
+        """Queue setCurrent and return the controller's S0_ response."""
+        return await self._enqueue(COMMAND_SET_CURRENT, int(current))
+
+    async def set_status(self, active):
+        """Queue setStatus and return the controller's S0_ response."""
+        return await self._enqueue(COMMAND_SET_STATUS, bool(active))
+
+    async def _enqueue(self, kind, value):
+        """Add a command, coalescing it with a waiting one of the same kind."""
+        if self._pending and self._pending[-1].kind == kind:
+            command = self._pending[-1]
+            command.value = value
+        else:
+            future = self.hass.loop.create_future()
+            future.add_done_callback(_consume_exception)
+            command = _Command(kind, value, future)
+            self._pending.append(command)
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_background_task(
+                self._async_run(), f"evse commands {self.client.host}"
+            )
+        return await asyncio.shield(command.future)
+
+    async def _async_run(self):
+        """Send the queued commands in order."""
+        while self._pending:
+            delay = self._last_sent + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            command = self._pending.pop(0)
+            self._last_sent = time.monotonic()
+            try:
+                if command.kind == COMMAND_SET_CURRENT:
+                    result = await self.client.set_current(command.value)
+                else:
+                    result = await self.client.set_status(command.value)
+            except asyncio.CancelledError:
+                command.future.cancel()
+                raise
+            except Exception as e:
+                command.future.set_exception(e)
+            else:
+                if self.tracker is not None:
+                    self.tracker.expect(COMMAND_KEYS[command.kind], command.value)
+                command.future.set_result(result)
+
+    async def async_stop(self):
+        """Cancel the worker and every command still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for command in self._pending:
+            command.future.cancel()
+        self._pending.clear()
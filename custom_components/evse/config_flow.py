@@ -1,29 +1,198 @@
+import dataclasses
+import ipaddress
+
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.components.network import async_get_source_ip
 from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.device_registry import format_mac
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN
+try:
+    from homeassistant.helpers.service_info.dhcp import DhcpServiceInfo
+except ImportError:
+    # Home Assistant before 2025.1
+    from homeassistant.components.dhcp import DhcpServiceInfo
+
+from .const import (
+    CONF_CHARGING_SCAN_INTERVAL,
+    CONF_CURRENT_DEADBAND,
+    CONF_DOWNSAMPLE_STATES,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_POWER_DEADBAND,
+    CONF_PRIORITY,
+    CONF_PUSH_UPDATES,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_CHARGING_SCAN_INTERVAL,
+    DEFAULT_CURRENT_DEADBAND,
+    DEFAULT_IDLE_SCAN_INTERVAL,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_VOLTAGE_DEADBAND,
+    DOMAIN,
+    MAX_SCAN_INTERVAL,
+    MIN_SCAN_INTERVAL,
+    REQUEST_TIMEOUT,
+)
+from .discovery import async_probe, async_scan, read_arp_table, subnet_hosts
+
+def _entry_data(charger, name=None):
+    """Return the config entry data of a discovered charger."""
+    data = {
+        'ip_address': charger.host,
+        'port': charger.port,
+        'name': name or _default_name(charger),
+    }
+    if charger.mac:
+        data['mac'] = charger.mac
+    return data
+
+def _default_name(charger):
+    """Return a name for a discovered charger, from its MAC or address."""
+    if charger.mac:
+        return f"evse_{charger.mac.replace(':', '')[-6:]}"
+    name = f"evse_{charger.host.replace('.', '_')}"
+    return name if charger.port == 80 else f"{name}_{charger.port}"
 
 class EVSEFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    def __init__(self):
+        """Initialize the flow."""
+        self._discovered = {}
+
     async def async_step_user(self, user_input=None):
+        """Let the user enter an address or search the network."""
+        return self.async_show_menu(step_id="user", menu_options=["manual", "scan"])
+
+    async def _async_identify(self, host, port):
+        """Probe a controller and look up its MAC address, None if it does not answer."""
+        # A single address gets the patience of a normal request, not that of a sweep
+        charger = await async_probe(async_get_clientsession(self.hass), host, port, timeout=REQUEST_TIMEOUT)
+        if charger is None:
+            return None
+        # The probe has just put the controller into the ARP table
+        table = await self.hass.async_add_executor_job(read_arp_table)
+        return dataclasses.replace(charger, mac=table.get(host))
+
+    async def async_step_manual(self, user_input=None):
+        """Add the charger at an address entered by the user."""
         errors = {}
         if user_input is not None:
-            # Create a unique_id based on the IP and port
-            unique_id = f"{user_input['ip_address']}:{user_input['port']}"
-            await self.async_set_unique_id(unique_id)
-            self._abort_if_unique_id_configured()
-            
-            return self.async_create_entry(title=user_input['name'], data=user_input)
-        
+            self._async_abort_entries_match(
+                {'ip_address': user_input['ip_address'], 'port': user_input['port']}
+            )
+            charger = await self._async_identify(user_input['ip_address'], user_input['port'])
+            if charger is None:
+                errors['base'] = "cannot_connect"
+            else:
+                updates = {'ip_address': charger.host, 'port': charger.port}
+                await self.async_set_unique_id(charger.unique_id)
+                self._abort_if_unique_id_configured(updates=updates)
+                if charger.mac and (result := self._async_update_mac_entry(charger.mac, updates)):
+                    return result
+                return self.async_create_entry(
+                    title=user_input['name'], data=_entry_data(charger, user_input['name'])
+                )
+
         data_schema = vol.Schema({
             vol.Required('ip_address'): str,
             vol.Required('port', default=80): int,
             vol.Required('name'): str
         })
-        return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
+        return self.async_show_form(step_id="manual", data_schema=data_schema, errors=errors)
+
+    async def async_step_scan(self, user_input=None):
+        """Search a subnet for chargers that are not configured yet."""
+        errors = {}
+        if user_input is not None:
+            try:
+                hosts = subnet_hosts(user_input['subnet'])
+            except ValueError:
+                errors['subnet'] = "invalid_subnet"
+            else:
+                found = await async_scan(hosts, [user_input['port']], async_get_clientsession(self.hass))
+                table = await self.hass.async_add_executor_job(read_arp_table)
+                entries = self._async_current_entries(include_ignore=True)
+                configured = {entry.unique_id for entry in entries}
+                configured |= {entry.data.get('mac') for entry in entries}
+                addresses = {(entry.data.get('ip_address'), entry.data.get('port')) for entry in entries}
+                for charger in found:
+                    charger = dataclasses.replace(charger, mac=table.get(charger.host))
+                    if charger.unique_id not in configured and (charger.host, charger.port) not in addresses:
+                        self._discovered[charger.unique_id] = charger
+                if not self._discovered:
+                    return self.async_abort(reason="no_devices_found")
+                return await self.async_step_select()
+
+        try:
+            subnet = f"{ipaddress.ip_interface(f'{await async_get_source_ip(self.hass)}/24').network}"
+        except ValueError:
+            subnet = ""
+        data_schema = vol.Schema({
+            vol.Required('subnet', default=subnet): str,
+            vol.Required('port', default=80): int,
+        })
+        return self.async_show_form(step_id="scan", data_schema=data_schema, errors=errors)
+
+    async def async_step_select(self, user_input=None):
+        """Add all chargers the user picked from the scan results."""
+        errors = {}
+        if user_input is not None:
+            selected = [self._discovered[key] for key in user_input['chargers']]
+            if not selected:
+                errors['base'] = "none_selected"
+            else:
+                # This flow adds the first charger, a discovery flow each of the others
+                for charger in selected[1:]:
+                    self.hass.async_create_task(self.hass.config_entries.flow.async_init(
+                        DOMAIN,
+                        context={"source": config_entries.SOURCE_INTEGRATION_DISCOVERY},
+                        data={**_entry_data(charger), 'unique_id': charger.unique_id},
+                    ))
+                charger = selected[0]
+                await self.async_set_unique_id(charger.unique_id)
+                self._abort_if_unique_id_configured()
+                data = _entry_data(charger)
+                return self.async_create_entry(title=data['name'], data=data)
+
+        options = {
+            key: f"{charger.host}:{charger.port}" + (f" ({charger.mac})" if charger.mac else "")
+            for key, charger in self._discovered.items()
+        }
+        data_schema = vol.Schema({
+            vol.Required('chargers', default=list(options)): cv.multi_select(options),
+        })
+        return self.async_show_form(step_id="select", data_schema=data_schema, errors=errors)
+
+    async def async_step_integration_discovery(self, discovery_info):
+        """Add a charger the user selected in another flow's scan results."""
+        data = dict(discovery_info)
+        await self.async_set_unique_id(data.pop('unique_id'))
+        self._abort_if_unique_id_configured(updates={'ip_address': data['ip_address'], 'port': data['port']})
+        self._async_abort_entries_match({'ip_address': data['ip_address'], 'port': data['port']})
+        return self.async_create_entry(title=data['name'], data=data)
+
+    async def async_step_dhcp(self, discovery_info: DhcpServiceInfo):
+        """Follow a known charger to the new IP address its DHCP server gave it."""
+        mac = format_mac(discovery_info.macaddress)
+        await self.async_set_unique_id(mac)
+        self._abort_if_unique_id_configured(updates={'ip_address': discovery_info.ip})
+        if result := self._async_update_mac_entry(mac, {'ip_address': discovery_info.ip}):
+            return result
+        return self.async_abort(reason="not_supported")
+
+    @callback
+    def _async_update_mac_entry(self, mac, updates):
+        """Update the entry that learned this MAC and abort, None if there is none."""
+        # Entries added by address are keyed by ip:port and keep the MAC in their data
+        for entry in self._async_current_entries():
+            if entry.data.get('mac') == mac:
+                if any(entry.data.get(key) != value for key, value in updates.items()):
+                    # The update listener of the entry reloads it
+                    self.hass.config_entries.async_update_entry(entry, data={**entry.data, **updates})
+                return self.async_abort(reason="already_configured")
+        return None
 
     @staticmethod
     @callback
@@ -41,7 +210,39 @@ class EVSEOptionsFlowHandler(config_entries.OptionsFlow):
         data_schema = vol.Schema({
             vol.Optional('ip_address', default=self.config_entry.data.get('ip_address')): str,
             vol.Optional('port', default=self.config_entry.data.get('port')): int,
-            vol.Optional('name', default=self.config_entry.data.get('name')): str
+            vol.Optional('name', default=self.config_entry.data.get('name')): str,
+            vol.Optional(
+                CONF_IDLE_SCAN_INTERVAL,
+                default=self.config_entry.options.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)),
+            vol.Optional(
+                CONF_CHARGING_SCAN_INTERVAL,
+                default=self.config_entry.options.get(CONF_CHARGING_SCAN_INTERVAL, DEFAULT_CHARGING_SCAN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)),
+            vol.Optional(
+                CONF_PUSH_UPDATES,
+                default=self.config_entry.options.get(CONF_PUSH_UPDATES, False),
+            ): bool,
+            vol.Optional(
+                CONF_VOLTAGE_DEADBAND,
+                default=self.config_entry.options.get(CONF_VOLTAGE_DEADBAND, DEFAULT_VOLTAGE_DEADBAND),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_CURRENT_DEADBAND,
+                default=self.config_entry.options.get(CONF_CURRENT_DEADBAND, DEFAULT_CURRENT_DEADBAND),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_POWER_DEADBAND,
+                default=self.config_entry.options.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_DOWNSAMPLE_STATES,
+                default=self.config_entry.options.get(CONF_DOWNSAMPLE_STATES, False),
+            ): bool,
+            vol.Optional(
+                CONF_PRIORITY,
+                default=self.config_entry.options.get(CONF_PRIORITY, 0),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
         })
         return self.async_show_form(step_id="init", data_schema=data_schema)
 
@@ -8,3 +8,124 @@ DEFAULT_PORT = 80
 
 CONF_HOST = "host"
 CONF_PORT = "port"
+CONF_IDLE_SCAN_INTERVAL = "idle_scan_interval"
+CONF_CHARGING_SCAN_INTERVAL = "charging_scan_interval"
+CONF_PUSH_UPDATES = "push_updates"
+CONF_VOLTAGE_DEADBAND = "voltage_deadband"
+CONF_CURRENT_DEADBAND = "current_deadband"
+CONF_POWER_DEADBAND = "power_deadband"
+CONF_PRIORITY = "priority"
+CONF_DOWNSAMPLE_STATES = "downsample_states"
+
+# HTTP client tuning for the ESP8266 web server on the controller
+REQUEST_TIMEOUT = 10
+MAX_CONNECTIONS_PER_HOST = 2
+KEEPALIVE_TIMEOUT = 30
+
+# On-device charging log, which can be a few hundred kB
+LOG_TIMEOUT = 60
+LOG_CHUNK_SIZE = 4096
+
+# Circuit breaker for unreachable controllers
+MIN_REQUEST_TIMEOUT = 2
+PROBE_TIMEOUT = 3
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BACKOFF_MIN = 30
+BREAKER_BACKOFF_MAX = 900
+
+# Network scan of the config flow: probes in flight, seconds per probe and
+# the largest subnet that is scanned
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_TIMEOUT = 2
+DISCOVERY_MAX_HOSTS = 1024
+
+# Fleet wide poll scheduling
+DATA_FLEET = "fleet"
+MAX_CONCURRENT_POLLS = 8
+MAX_CONCURRENT_COMMANDS = 16
+LATENCY_SAMPLES = 100
+POLL_RATE_WINDOW = 60
+
+# Samples kept per series by the per-charger metrics
+METRIC_SAMPLES = 256
+
+SERVICE_GET_FLEET_METRICS = "get_fleet_metrics"
+SERVICE_CONFIGURE_LOAD_BALANCING = "configure_load_balancing"
+SERVICE_GET_SESSION_REPORT = "get_session_report"
+SERVICE_SET_CHARGING_SCHEDULE = "set_charging_schedule"
+SERVICE_SET_CURRENT_BULK = "set_current_bulk"
+SERVICE_SET_STATUS_BULK = "set_status_bulk"
+
+# Retries of a bulk command per charger, the delay doubles after each
+BULK_RETRIES = 2
+BULK_RETRY_DELAY = 0.5
+
+# Adaptive polling
+DEFAULT_IDLE_SCAN_INTERVAL = 120
+DEFAULT_CHARGING_SCAN_INTERVAL = 5
+MIN_SCAN_INTERVAL = 2
+MAX_SCAN_INTERVAL = 3600
+POLL_BOOST_INTERVAL = 2
+POLL_BOOST_DURATION = 20
+POLL_HYSTERESIS_SAMPLES = 3
+
+# WebSocket push updates
+WS_HEARTBEAT = 30
+PUSH_RESYNC_INTERVAL = 300
+# Status frames are requested at least this often, and push counts as live
+# only while the last frame is younger than PUSH_FRAME_TIMEOUT
+PUSH_REQUEST_INTERVAL = 20
+PUSH_FRAME_TIMEOUT = 60
+PUSH_BACKOFF_MIN = 1
+PUSH_BACKOFF_MAX = 300
+
+# Deadbands below which noisy analog values are not written again
+DEFAULT_VOLTAGE_DEADBAND = 1.0
+DEFAULT_CURRENT_DEADBAND = 0.1
+DEFAULT_POWER_DEADBAND = 0.05
+
+# Minimum seconds between two commands sent to one controller
+COMMAND_MIN_INTERVAL = 1.0
+
+# Seconds a sent command's expected value is shown before it is rolled back
+COMMAND_CONFIRM_TIMEOUT = 15
+
+# Dynamic load balancing across chargers on one supply
+MIN_CHARGING_CURRENT = 6
+DATA_LOAD_MANAGER = "load_manager"
+LOAD_BALANCE_INTERVAL = 15
+LOAD_BALANCE_STORAGE_KEY = "evse.load_balancing"
+LOAD_BALANCE_STORAGE_VERSION = 1
+
+# Charging session history, one file per charger below the config dir
+SESSION_DIR = "evse_sessions"
+PROFILE_INTERVAL = 60
+PROFILE_MAX_SAMPLES = 720
+
+# Incremental import of the on-device charging log into statistics
+LOG_STORAGE_KEY = "evse.charging_log"
+LOG_STORAGE_VERSION = 1
+LOG_SYNC_INTERVAL = 21600
+LOG_SYNC_DELAY = 30
+LOG_IMPORT_BATCH = 500
+
+# In-memory statistics windows: one hour of 1 min and a day of 5 min windows
+MINUTE_WINDOWS = 60
+FIVE_MINUTE_WINDOWS = 288
+
+# Smart charging schedule per charger
+SCHEDULE_STORAGE_KEY = "evse.schedule"
+SCHEDULE_STORAGE_VERSION = 1
+# Seconds to wait for a missing forecast, e.g. while Home Assistant starts,
+# before charging right away
+FORECAST_WAIT = 600
+
+# Rolling phase analytics: window in seconds and the current in A above
+# which a phase counts as drawing
+ANALYTICS_WINDOW = 300
+ACTIVE_PHASE_CURRENT = 1.0
+
+# Last good snapshot per charger, restored at startup
+SNAPSHOT_STORAGE_KEY = "evse.snapshot"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
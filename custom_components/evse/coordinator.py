@@ -0,0 +1,224 @@
+from functools import partial
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .analytics import PhaseAnalytics
+from .api import EVSEClient, EVSEError
+from .commands import CommandTracker, EVSECommandQueue
+from .const import (
+    CONF_CHARGING_SCAN_INTERVAL,
+    CONF_DOWNSAMPLE_STATES,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_PUSH_UPDATES,
+    DEFAULT_CHARGING_SCAN_INTERVAL,
+    DEFAULT_IDLE_SCAN_INTERVAL,
+    DOMAIN,
+    MIN_CHARGING_CURRENT,
+    PUSH_RESYNC_INTERVAL,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .delta import SnapshotDiffer, deadbands_from_options
+from .health import ChargerHealth
+from .log_import import EVSELogImporter
+from .metrics import ChargerMetrics
+from .models import EVSEParameters
+from .polling import MODE_CONNECTED, MODE_IDLE, PollingPolicy
+from .push import EVSEPushListener
+from .scheduler import EVSEScheduler
+from .sessions import EVSESessionRecorder
+from .statistics import EVSEStatistics
+
+_LOGGER = logging.getLogger(__name__)
+
+class EVSEDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch /getParameters once per interval and share it with all entities.
+
+    The coordinator does not run its own timer, the domain wide EVSEFleet
+    calls async_refresh on a staggered schedule instead.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, fleet):
+        """Initialize the coordinator."""
+        self.config_entry = config_entry
+        self.fleet = fleet
+        self.ip = config_entry.data['ip_address']
+        self.port = config_entry.data['port']
+        self.metrics = ChargerMetrics()
+        self.client = EVSEClient(
+            self.ip, self.port, metrics=self.metrics, session_factory=partial(async_create_clientsession, hass)
+        )
+        self.tracker = CommandTracker(hass, self._async_commands_changed)
+        self.commands = EVSECommandQueue(hass, self.client, self.tracker)
+        self.policy = PollingPolicy(
+            config_entry.options.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL),
+            config_entry.options.get(CONF_CHARGING_SCAN_INTERVAL, DEFAULT_CHARGING_SCAN_INTERVAL),
+        )
+        self.differ = SnapshotDiffer(deadbands_from_options(config_entry.options))
+        self.changed_keys = frozenset()
+        self.health = ChargerHealth()
+        self.sessions = EVSESessionRecorder(hass, config_entry.entry_id, config_entry.data['name'])
+        self.log_importer = EVSELogImporter(hass, self)
+        self.scheduler = EVSEScheduler(hass, self)
+        self.statistics = EVSEStatistics(
+            hass,
+            config_entry.entry_id,
+            config_entry.data['name'],
+            config_entry.options.get(CONF_DOWNSAMPLE_STATES, False),
+        )
+        self.analytics = PhaseAnalytics()
+        self.push = EVSEPushListener(hass, self) if config_entry.options.get(CONF_PUSH_UPDATES) else None
+        self._snapshot_store = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}"
+        )
+        self._snapshot_save_pending = False
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{config_entry.data['name']}",
+            update_interval=None,
+        )
+
+    @property
+    def poll_interval(self):
+        """Return the seconds between two scheduled polls."""
+        if self.push is not None and self.push.live and self.policy.mode in (MODE_IDLE, MODE_CONNECTED):
+            # The status frames carry no phase currents or voltages, so only
+            # while nothing is charging do polls merely resync the snapshot
+            return max(self.policy.interval, PUSH_RESYNC_INTERVAL)
+        return self.policy.interval
+
+    async def async_restore(self):
+        """Show the last stored snapshot until the first poll, return True if there was one."""
+        stored = await self._snapshot_store.async_load()
+        if stored is None:
+            return False
+        self.data = EVSEParameters.from_dict(stored["parameters"])
+        self.policy.update(self.data)
+        _LOGGER.debug(f"Restored the snapshot of {self.ip} from {stored['time']}")
+        return True
+
+    @callback
+    def _async_save_snapshot(self):
+        """Store the latest snapshot at most once per SNAPSHOT_SAVE_DELAY."""
+        # async_delay_save restarts its timer on every call, which a poll
+        # faster than the delay would do forever
+        if not self._snapshot_save_pending:
+            self._snapshot_save_pending = True
+            self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _snapshot_data(self):
+        """Return the snapshot to store, read when the write happens."""
+        self._snapshot_save_pending = False
+        return {"parameters": self.data.as_dict(), "time": dt_util.utcnow().isoformat()}
+
+    @callback
+    def async_push_update(self, update):
+        """Merge a partial snapshot received over the WebSocket."""
+        self.metrics.start_cycle()
+        self.metrics.record_snapshot()
+        data = self.data.merged(update) if self.data is not None else EVSEParameters.from_dict(update)
+        interval = self.poll_interval
+        self.policy.update(data)
+        if self.poll_interval != interval:
+            # E.g. charging started, poll for the fields the frames lack
+            self.fleet.async_reschedule(self.config_entry.entry_id)
+        self.tracker.async_update(data)
+        if self.sessions.async_update(data):
+            self.log_importer.async_schedule_sync()
+        self.changed_keys = self.statistics.async_update(data, self.differ.diff(data))
+        self.changed_keys |= self.analytics.update(time.monotonic(), data)
+        self.async_set_updated_data(data)
+        if self.changed_keys:
+            self._async_save_snapshot()
+
+    @callback
+    def _async_commands_changed(self, keys):
+        """Let the entities showing these keys write the expected or rolled back value."""
+        self.changed_keys = frozenset(keys)
+        self.async_update_listeners()
+
+    async def async_apply_current(self, current, resume=True):
+        """Bring the charger to a charging current, below the minimum it is paused.
+
+        The sent values count, not only the polled ones, so a command whose
+        effect has not been polled yet is not sent again. With resume unset,
+        a charger that is off stays off. Raises EVSEError.
+        """
+        if self.data is None:
+            return
+        if current < MIN_CHARGING_CURRENT:
+            if self.tracker.value("evseState", self.data):
+                await self.commands.set_status(False)
+                self.async_boost()
+            return
+        if self.tracker.value("actualCurrent", self.data) != current:
+            await self.commands.set_current(current)
+            self.async_boost()
+        if resume and not self.tracker.value("evseState", self.data):
+            await self.commands.set_status(True)
+            self.async_boost()
+
+    @callback
+    def async_boost(self):
+        """Poll fast for a while after a command was sent to the charger."""
+        self.policy.boost()
+        self.fleet.async_reschedule(self.config_entry.entry_id)
+
+    async def _async_update_data(self):
+        """Fetch the parameter list from the EVSE controller."""
+        entry_id = self.config_entry.entry_id
+        self.changed_keys = frozenset()
+        self.metrics.start_cycle()
+        if not self.health.allow_request():
+            # Circuit open: skip the request instead of waiting for another timeout
+            raise UpdateFailed(f"{self.ip} unreachable, next attempt in {self.health.retry_in:.0f} s")
+        async with self.fleet.semaphore:
+            probing = self.health.probing
+            start = time.monotonic()
+            try:
+                data = await self.client.get_parameters(timeout=self.health.timeout)
+            except EVSEError as e:
+                self.fleet.async_record_poll(entry_id, time.monotonic() - start, False)
+                if self.health.record_failure():
+                    _LOGGER.warning(
+                        f"EVSE at {self.ip} failed {self.health.failures} polls in a row, "
+                        f"backing off for {self.health.retry_in:.0f} s"
+                    )
+                elif probing:
+                    _LOGGER.debug(f"Probe of EVSE at {self.ip} failed, backing off for {self.health.retry_in:.0f} s")
+                raise UpdateFailed(str(e)) from e
+        latency = time.monotonic() - start
+        self.fleet.async_record_poll(entry_id, latency, True)
+        self.health.record_success(latency)
+        self.metrics.record_snapshot()
+        self.policy.update(data)
+        self.tracker.async_update(data)
+        if self.sessions.async_update(data):
+            self.log_importer.async_schedule_sync()
+        self.changed_keys = self.statistics.async_update(data, self.differ.diff(data))
+        self.changed_keys |= self.analytics.update(time.monotonic(), data)
+        if self.changed_keys:
+            self._async_save_snapshot()
+        return data
+
+    async def async_shutdown(self):
+        """Stop polling and close the HTTP session."""
+        await super().async_shutdown()
+        self.log_importer.async_shutdown()
+        self.scheduler.async_shutdown()
+        await self.commands.async_stop()
+        self.tracker.async_shutdown()
+        if self.push is not None:
+            await self.push.async_stop()
+        await self.sessions.async_shutdown()
+        await self.client.close()
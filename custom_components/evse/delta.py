@@ -0,0 +1,70 @@
+"""Change detection between consecutive parameter snapshots."""
+from .const import (
+    CONF_CURRENT_DEADBAND,
+    CONF_POWER_DEADBAND,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_CURRENT_DEADBAND,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_VOLTAGE_DEADBAND,
+)
+from .models import PARAMETERS
+
+# Noisy analog fields and the option that holds their deadband
+DEADBAND_FIELDS = {
+    "voltageP1": CONF_VOLTAGE_DEADBAND,
+    "voltageP2": CONF_VOLTAGE_DEADBAND,
+    "voltageP3": CONF_VOLTAGE_DEADBAND,
+    "currentP1": CONF_CURRENT_DEADBAND,
+    "currentP2": CONF_CURRENT_DEADBAND,
+    "currentP3": CONF_CURRENT_DEADBAND,
+    "actualPower": CONF_POWER_DEADBAND,
+}
+
+DEFAULT_DEADBANDS = {
+    CONF_VOLTAGE_DEADBAND: DEFAULT_VOLTAGE_DEADBAND,
+    CONF_CURRENT_DEADBAND: DEFAULT_CURRENT_DEADBAND,
+    CONF_POWER_DEADBAND: DEFAULT_POWER_DEADBAND,
+}
+
+
+def deadbands_from_options(options):
+    """Return the per-key deadbands configured in the entry options."""
+    return {
+        key: options.get(option, DEFAULT_DEADBANDS[option])
+        for key, option in DEADBAND_FIELDS.items()
+    }
+
+
+class SnapshotDiffer:
+    """Report which keys of a snapshot changed since they were last reported.
+
+    Keys with a deadband only count as changed once they moved at least the
+    deadband away from the value that was last reported, so slow drift
+    still gets through while measurement noise does not.
+    """
+
+    def __init__(self, deadbands=None):
+        """Initialize the differ with per-key deadbands."""
+        self._deadbands = deadbands or {}
+        self._reported = {}
+
+    def diff(self, data):
+        """Return the /getParameters keys that changed in an EVSEParameters snapshot."""
+        changed = []
+        reported = self._reported
+        for key, field, _ in PARAMETERS:
+            value = getattr(data, field)
+            if key not in reported:
+                changed.append(key)
+                reported[key] = value
+                continue
+            old = reported[key]
+            if value == old:
+                continue
+            deadband = self._deadbands.get(key)
+            if deadband and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                if abs(value - old) < deadband:
+                    continue
+            changed.append(key)
+            reported[key] = value
+        return frozenset(changed)
@@ -0,0 +1,34 @@
+"""Diagnostics download of an EVSE charger."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"RFIDUID", "lastActionUID", "lastActionUser"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry):
+    """Return the metrics, health and latest snapshot of a charger."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    data = coordinator.data
+    return {
+        "entry": {
+            "title": config_entry.title,
+            "data": dict(config_entry.data),
+            "options": dict(config_entry.options),
+        },
+        "snapshot": None if data is None else async_redact_data(data.as_dict(), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "polling": {
+            "mode": coordinator.policy.mode,
+            "interval": coordinator.poll_interval,
+            "push_connected": coordinator.push is not None and coordinator.push.connected,
+            "push_live": coordinator.push is not None and coordinator.push.live,
+        },
+        "health": coordinator.health.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "statistics": coordinator.statistics.pipeline.as_dict(),
+        "analytics": coordinator.analytics.as_dict(),
+        "schedule": coordinator.scheduler.as_dict(),
+    }
@@ -0,0 +1,87 @@
+"""Discovery of SimpleEVSE-WiFi controllers on the local network."""
+import asyncio
+import ipaddress
+from dataclasses import dataclass
+
+import aiohttp
+
+from .api import EVSEClient, EVSEError
+from .const import DISCOVERY_CONCURRENCY, DISCOVERY_MAX_HOSTS, DISCOVERY_TIMEOUT
+from .models import EVSEParameters
+
+ARP_TABLE = "/proc/net/arp"
+
+
+@dataclass(slots=True, frozen=True)
+class DiscoveredCharger:
+    """A controller that answered /getParameters."""
+
+    host: str
+    port: int
+    parameters: EVSEParameters
+    mac: str | None = None
+
+    @property
+    def unique_id(self):
+        """Return the MAC address, which survives a new IP, or host:port if it is unknown."""
+        return self.mac or f"{self.host}:{self.port}"
+
+
+def read_arp_table(path=ARP_TABLE):
+    """Return the MAC address of every IPv4 neighbour the kernel knows, blocking."""
+    try:
+        with open(path, encoding="ascii") as file:
+            lines = file.readlines()[1:]
+    except OSError:
+        return {}
+    table = {}
+    for line in lines:
+        # IP address, HW type, flags, HW address, mask, device
+        fields = line.split()
+        if len(fields) >= 4 and fields[2] != "0x0" and fields[3] != "00:00:00:00:00:00":
+            table[fields[0]] = fields[3].lower()
+    return table
+
+
+def subnet_hosts(subnet, max_hosts=DISCOVERY_MAX_HOSTS):
+    """Return the host addresses of a subnet like 192.168.1.0/24.
+
+    Raises ValueError for an invalid subnet or one with more than max_hosts
+    addresses.
+    """
+    network = ipaddress.ip_network(subnet.strip(), strict=False)
+    if network.num_addresses > max_hosts:
+        raise ValueError(f"{subnet} has more than {max_hosts} addresses")
+    return [str(host) for host in network.hosts()] or [str(network.network_address)]
+
+
+async def async_probe(session, host, port, timeout=DISCOVERY_TIMEOUT):
+    """Return the controller at host:port, None if nothing answers like one."""
+    try:
+        parameters = await EVSEClient(host, port, session=session).get_parameters(timeout=timeout)
+    except EVSEError:
+        return None
+    return DiscoveredCharger(host, port, parameters)
+
+
+async def async_scan(hosts, ports, session=None, concurrency=DISCOVERY_CONCURRENCY, timeout=DISCOVERY_TIMEOUT):
+    """Probe every host on every port and return the controllers that answered.
+
+    At most ``concurrency`` probes are in flight and each gives up after
+    ``timeout`` seconds, so a /24 takes a few timeouts, not 254.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(host, port):
+        async with semaphore:
+            return await async_probe(session, host, port, timeout)
+
+    owns_session = session is None
+    if owns_session:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency))
+    try:
+        found = await asyncio.gather(*(probe(host, port) for host in hosts for port in ports))
+    finally:
+        if owns_session:
+            await session.close()
+    return [charger for charger in found if charger is not None]
@@ -0,0 +1,48 @@
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+
+class EVSEEntity(CoordinatorEntity):
+    """Base class for entities fed by the shared parameter snapshot.
+
+    Entities list the snapshot keys they show in ``_watched_keys`` and only
+    write their state when one of those keys or their availability changed.
+    """
+
+    _watched_keys = ()
+
+    def __init__(self, coordinator, entry_id):
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._entry_id = entry_id
+        self._last_available = None
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        info = {
+            "identifiers": {(DOMAIN, self._entry_id)},
+        }
+        if mac := self.coordinator.config_entry.data.get('mac'):
+            # Lets DHCP discovery follow the charger to a new IP address
+            info["connections"] = {(CONNECTION_NETWORK_MAC, mac)}
+        return info
+
+    def _snapshot_changed(self):
+        """Return True if a watched key changed in the latest snapshot."""
+        return not self.coordinator.changed_keys.isdisjoint(self._watched_keys)
+
+    def _update_from_data(self, data):
+        """Take the entity state from a parameter snapshot."""
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if availability or a watched key changed."""
+        if self.available == self._last_available and not self._snapshot_changed():
+            return
+        self._update_from_data(self.coordinator.data)
+        self._last_available = self.available
+        self.coordinator.metrics.count_write()
+        self.async_write_ha_state()
@@ -0,0 +1,252 @@
+"""Domain wide poll scheduler shared by all EVSE chargers."""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import EVSECommandError, EVSEConnectionError, EVSEError
+from .commands import COMMAND_SET_CURRENT
+from .const import (
+    BULK_RETRIES,
+    BULK_RETRY_DELAY,
+    LATENCY_SAMPLES,
+    MAX_CONCURRENT_COMMANDS,
+    MAX_CONCURRENT_POLLS,
+    POLL_RATE_WINDOW,
+)
+from .metrics import percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def next_slot(now, interval, phase):
+    """Return the next time after now that lies on the charger's phase grid.
+
+    Every charger polls on the grid ``phase * interval + k * interval``,
+    so chargers with evenly spread phases never fire together.
+    """
+    return now + interval - ((now - phase * interval) % interval)
+
+
+class ChargerPollStats:
+    """Poll counters and recent latencies of one charger."""
+
+    __slots__ = ("name", "polls", "failures", "latencies")
+
+    def __init__(self, name):
+        """Initialize the counters."""
+        self.name = name
+        self.polls = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def as_dict(self):
+        """Return the statistics as a dict."""
+        p50 = percentile(self.latencies, 0.5)
+        p99 = percentile(self.latencies, 0.99)
+        return {
+            "name": self.name,
+            "polls": self.polls,
+            "failures": self.failures,
+            "latency_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "latency_p99_ms": None if p99 is None else round(p99 * 1000, 1),
+        }
+
+
+class EVSEFleet:
+    """Schedule the polls of all chargers with staggered phases.
+
+    Each charger gets an evenly spread phase within its poll interval and
+    every request goes through one semaphore, so a large fleet neither
+    fires all at once nor floods the LAN and the event loop.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_concurrent=MAX_CONCURRENT_POLLS):
+        """Initialize the fleet."""
+        self.hass = hass
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.coordinators = {}
+        self.stats = {}
+        self._phases = {}
+        self._timers = {}
+        self._polling = set()
+        self._poll_times = deque()
+
+    @callback
+    def async_add(self, coordinator):
+        """Add a charger to the fleet and rebalance the poll phases."""
+        entry_id = coordinator.config_entry.entry_id
+        self.coordinators[entry_id] = coordinator
+        self.stats.setdefault(entry_id, ChargerPollStats(coordinator.config_entry.data['name']))
+        self._async_rebalance()
+
+    @callback
+    def async_remove(self, entry_id):
+        """Remove a charger from the fleet and rebalance the poll phases."""
+        self.coordinators.pop(entry_id, None)
+        self.stats.pop(entry_id, None)
+        self._phases.pop(entry_id, None)
+        if (timer := self._timers.pop(entry_id, None)) is not None:
+            timer.cancel()
+        self._async_rebalance()
+
+    @callback
+    def _async_rebalance(self):
+        """Spread the phases of all chargers evenly across the interval."""
+        count = len(self.coordinators)
+        for index, entry_id in enumerate(self.coordinators):
+            self._phases[entry_id] = index / count
+            self._async_schedule(entry_id)
+
+    @callback
+    def async_reschedule(self, entry_id):
+        """Re-arm a charger's timer after its poll interval changed."""
+        if entry_id in self.coordinators:
+            self._async_schedule(entry_id)
+
+    @callback
+    def async_poll_now(self, entry_id):
+        """Poll a charger right away instead of at its next slot."""
+        if entry_id in self.coordinators and entry_id not in self._polling:
+            if (timer := self._timers.pop(entry_id, None)) is not None:
+                timer.cancel()
+            self._async_fire(entry_id)
+
+    @callback
+    def _async_schedule(self, entry_id):
+        """Arm the timer for the next poll of a charger."""
+        if (timer := self._timers.pop(entry_id, None)) is not None:
+            timer.cancel()
+        if entry_id in self._polling:
+            # The running poll schedules the next one when it finishes
+            return
+        coordinator = self.coordinators[entry_id]
+        loop = self.hass.loop
+        if (retry_in := coordinator.health.retry_in) > 0:
+            # Circuit open: wake up once for the half-open probe
+            when = loop.time() + retry_in
+        else:
+            when = next_slot(loop.time(), coordinator.poll_interval, self._phases[entry_id])
+        self._timers[entry_id] = loop.call_at(when, self._async_fire, entry_id)
+
+    @callback
+    def _async_fire(self, entry_id):
+        """Start a scheduled poll."""
+        self._timers.pop(entry_id, None)
+        if entry_id not in self.coordinators:
+            return
+        self._polling.add(entry_id)
+        self.hass.async_create_background_task(self._async_poll(entry_id), f"evse poll {entry_id}")
+
+    async def _async_poll(self, entry_id):
+        """Refresh a charger and schedule its next poll."""
+        try:
+            await self.coordinators[entry_id].async_refresh()
+        finally:
+            self._polling.discard(entry_id)
+            if entry_id in self.coordinators:
+                self._async_schedule(entry_id)
+
+    @callback
+    def async_record_poll(self, entry_id, latency, success):
+        """Record the outcome of one /getParameters request."""
+        now = time.monotonic()
+        self._poll_times.append(now)
+        while self._poll_times and self._poll_times[0] < now - POLL_RATE_WINDOW:
+            self._poll_times.popleft()
+        if (stats := self.stats.get(entry_id)) is None:
+            return
+        stats.polls += 1
+        stats.latencies.append(latency)
+        if not success:
+            stats.failures += 1
+
+    async def async_send_bulk(self, entry_ids, kind, value, retries=BULK_RETRIES):
+        """Send one command to many chargers at once and return the outcome per charger.
+
+        The chargers are commanded concurrently, at most
+        MAX_CONCURRENT_COMMANDS at a time, so the whole batch takes about one
+        round-trip. Connection errors are retried per charger, rejected
+        commands are not, and chargers whose circuit is open are skipped
+        instead of waiting for their timeout.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMMANDS)
+        results = await asyncio.gather(*(
+            self._async_send_one(self.coordinators[entry_id], kind, value, retries, semaphore)
+            for entry_id in entry_ids
+        ))
+        return dict(zip(entry_ids, results))
+
+    async def _async_send_one(self, coordinator, kind, value, retries, semaphore):
+        """Send a bulk command to one charger, retrying connection errors."""
+        result = {"name": coordinator.config_entry.data['name'], "success": False, "attempts": 0}
+        if (retry_in := coordinator.health.retry_in) > 0:
+            result["error"] = f"unreachable, next attempt in {retry_in:.0f} s"
+            return result
+        if kind == COMMAND_SET_CURRENT and coordinator.data is not None and coordinator.data.max_current:
+            # Above the charger's own limit the controller answers E1
+            value = min(value, coordinator.data.max_current)
+        result["value"] = value
+        delay = BULK_RETRY_DELAY
+        while True:
+            result["attempts"] += 1
+            try:
+                async with semaphore:
+                    if kind == COMMAND_SET_CURRENT:
+                        result["response"] = await coordinator.commands.set_current(value)
+                    else:
+                        result["response"] = await coordinator.commands.set_status(value)
+            except EVSECommandError as e:
+                if e.code == "E3" and kind != COMMAND_SET_CURRENT:
+                    # Already in the requested state
+                    coordinator.tracker.expect("evseState", value)
+                    result.update(success=True, response=e.response_text)
+                else:
+                    result["error"] = e.response_text
+                break
+            except EVSEConnectionError as e:
+                if result["attempts"] > retries:
+                    result["error"] = str(e) or type(e).__name__
+                    break
+                # Back off without holding a slot of the other chargers
+                await asyncio.sleep(delay)
+                delay *= 2
+            except EVSEError as e:
+                result["error"] = str(e)
+                break
+            else:
+                result["success"] = True
+                coordinator.async_boost()
+                break
+        if not result["success"]:
+            _LOGGER.warning(f"Bulk {kind} to {result['name']} failed: {result['error']}")
+        return result
+
+    @callback
+    def async_shutdown(self):
+        """Cancel all pending poll timers."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+
+    def metrics(self):
+        """Return fleet wide poll metrics."""
+        now = time.monotonic()
+        recent = sum(1 for poll_time in self._poll_times if poll_time >= now - POLL_RATE_WINDOW)
+        latencies = [latency for stats in self.stats.values() for latency in stats.latencies]
+        p50 = percentile(latencies, 0.5)
+        p99 = percentile(latencies, 0.99)
+        return {
+            "chargers": len(self.coordinators),
+            "in_flight": len(self._polling),
+            "polls_per_second": round(recent / POLL_RATE_WINDOW, 3),
+            "latency_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "latency_p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            "per_charger": {
+                entry_id: {**stats.as_dict(), "health": self.coordinators[entry_id].health.as_dict()}
+                for entry_id, stats in self.stats.items()
+                if entry_id in self.coordinators
+            },
+        }
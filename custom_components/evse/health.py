@@ -0,0 +1,101 @@
+"""Circuit breaker and adaptive timeouts for one controller."""
+import random
+import time
+
+from .const import (
+    BREAKER_BACKOFF_MAX,
+    BREAKER_BACKOFF_MIN,
+    BREAKER_FAILURE_THRESHOLD,
+    MIN_REQUEST_TIMEOUT,
+    PROBE_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
+
+STATE_HEALTHY = "healthy"
+STATE_DEGRADED = "degraded"
+STATE_OPEN = "open"
+
+
+class ChargerHealth:
+    """Track whether a controller answers and how fast.
+
+    After a failure the charger is degraded; after BREAKER_FAILURE_THRESHOLD
+    failures in a row the circuit opens and no requests are made until an
+    exponentially growing, jittered backoff has passed. The first request
+    after that is a half-open probe with a short timeout: success closes
+    the circuit, failure opens it again for longer.
+
+    Request timeouts follow the measured round-trip time the way TCP sets
+    its retransmission timeout: smoothed RTT plus four times its variance,
+    doubled for every failure in a row.
+    """
+
+    def __init__(self):
+        """Initialize a healthy charger."""
+        self.state = STATE_HEALTHY
+        self.failures = 0
+        self.srtt = None
+        self.rttvar = None
+        self._backoff = BREAKER_BACKOFF_MIN
+        self._open_until = 0.0
+
+    @property
+    def probing(self):
+        """Return True if the next request is a half-open probe."""
+        return self.state == STATE_OPEN and time.monotonic() >= self._open_until
+
+    @property
+    def retry_in(self):
+        """Return the seconds until requests are allowed again."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    @property
+    def timeout(self):
+        """Return the timeout for the next request."""
+        if self.probing:
+            return PROBE_TIMEOUT
+        if self.srtt is None:
+            return REQUEST_TIMEOUT
+        # Double the timeout per failure in a row so a slow charger is not cut off
+        timeout = max(self.srtt + 4 * self.rttvar, MIN_REQUEST_TIMEOUT) * 2 ** min(self.failures, 4)
+        return min(timeout, REQUEST_TIMEOUT)
+
+    def allow_request(self):
+        """Return False while the circuit is open and backing off."""
+        return self.state != STATE_OPEN or self.probing
+
+    def record_success(self, rtt):
+        """Close the circuit and feed the round-trip time into the estimate."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.state = STATE_HEALTHY
+        self.failures = 0
+        self._backoff = BREAKER_BACKOFF_MIN
+
+    def record_failure(self):
+        """Count a failure and return True if it opened the circuit."""
+        self.failures += 1
+        if self.state == STATE_OPEN or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            opened = self.state != STATE_OPEN
+            self.state = STATE_OPEN
+            self._open_until = time.monotonic() + self._backoff * random.uniform(0.8, 1.2)
+            self._backoff = min(self._backoff * 2, BREAKER_BACKOFF_MAX)
+            return opened
+        self.state = STATE_DEGRADED
+        return False
+
+    def as_dict(self):
+        """Return the health as a dict."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "srtt_ms": None if self.srtt is None else round(self.srtt * 1000, 1),
+            "timeout_s": round(self.timeout, 2),
+            "retry_in_s": round(self.retry_in, 1),
+        }
@@ -0,0 +1,231 @@
+"""Dynamic load balancing of chargers that share one grid connection."""
+import asyncio
+import logging
+from datetime import timedelta
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .allocation import MODE_FAIR_SHARE, ChargerDemand, allocate
+from .api import EVSEError
+from .const import (
+    CONF_PRIORITY,
+    LOAD_BALANCE_INTERVAL,
+    LOAD_BALANCE_STORAGE_KEY,
+    LOAD_BALANCE_STORAGE_VERSION,
+    MIN_CHARGING_CURRENT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "supply_current": 32,
+    "meter_entity": None,
+    "mode": MODE_FAIR_SHARE,
+}
+
+
+def _number(value):
+    """Return value as float, treating missing values as 0."""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def charger_draw(data):
+    """Return the current in A a charger draws on its most loaded phase."""
+    phase_current = max(data.current_p1 or 0, data.current_p2 or 0, data.current_p3 or 0)
+    if phase_current:
+        return phase_current
+    if data.vehicle_state == 3:
+        return data.actual_current or 0
+    return 0.0
+
+
+class EVSELoadManager:
+    """Split one supply between all chargers of the fleet.
+
+    Every LOAD_BALANCE_INTERVAL seconds the manager reads the latest
+    snapshot of each charger plus an optional house meter, computes new
+    current limits and applies them through the chargers' command queues,
+    which already rate limit and coalesce setCurrent.
+    """
+
+    def __init__(self, hass: HomeAssistant, fleet):
+        """Initialize the load manager."""
+        self.hass = hass
+        self.fleet = fleet
+        self.config = dict(DEFAULT_CONFIG)
+        self.allocation = {}
+        self._paused = set()
+        self._disabled = set()
+        self._store = Store(hass, LOAD_BALANCE_STORAGE_VERSION, LOAD_BALANCE_STORAGE_KEY)
+        self._unsub = None
+        self._lock = asyncio.Lock()
+
+    async def async_load(self):
+        """Restore configuration and paused chargers, start balancing if enabled."""
+        if (stored := await self._store.async_load()) is not None:
+            # A paused charger is off, only this set tells it apart from one its user switched off
+            self._paused = set(stored.pop("paused", ()))
+            self._disabled = set(stored.pop("disabled", ()))
+            self.config.update(stored)
+        self._async_apply_config()
+
+    async def _async_save(self):
+        """Persist the configuration together with the paused and disabled chargers."""
+        await self._store.async_save(
+            {**self.config, "paused": sorted(self._paused), "disabled": sorted(self._disabled)}
+        )
+
+    def user_disabled(self, entry_id):
+        """Return True if the charger was switched off by hand and must stay off."""
+        return entry_id in self._disabled
+
+    async def async_set_user_enabled(self, entry_ids, enabled):
+        """Record that chargers were switched on or off by the switch or a bulk call.
+
+        A charger switched off this way is no longer paused but disabled, so
+        neither the manager nor its charging schedule turns it back on until
+        it is switched on again.
+        """
+        async with self._lock:
+            before = (set(self._paused), set(self._disabled))
+            if enabled:
+                self._disabled.difference_update(entry_ids)
+            else:
+                self._paused.difference_update(entry_ids)
+                self._disabled.update(entry_ids)
+            if (self._paused, self._disabled) != before:
+                await self._async_save()
+
+    async def async_forget(self, entry_id):
+        """Drop a removed charger from the paused and disabled chargers."""
+        async with self._lock:
+            if entry_id in self._paused or entry_id in self._disabled:
+                self._paused.discard(entry_id)
+                self._disabled.discard(entry_id)
+                await self._async_save()
+
+    async def async_configure(self, **changes):
+        """Update and persist the configuration."""
+        self.config.update(changes)
+        self._async_apply_config()
+        if self.config["enabled"]:
+            await self._async_save()
+            await self.async_rebalance()
+            return
+        paused, self._paused = self._paused, set()
+        await self._async_save()
+        # Give chargers paused by the manager back to their users
+        for entry_id in paused:
+            if (coordinator := self.fleet.coordinators.get(entry_id)) is None:
+                continue
+            try:
+                await coordinator.commands.set_status(True)
+            except EVSEError as e:
+                _LOGGER.warning(f"Could not resume {coordinator.name}: {e}")
+
+    @callback
+    def _async_apply_config(self):
+        """Start or stop the periodic rebalance."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self.config["enabled"]:
+            self._unsub = async_track_time_interval(
+                self.hass, self._async_interval, timedelta(seconds=LOAD_BALANCE_INTERVAL)
+            )
+        else:
+            self.allocation = {}
+
+    @callback
+    def async_shutdown(self):
+        """Stop the periodic rebalance."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def _async_interval(self, now):
+        """Rebalance on the timer."""
+        await self.async_rebalance()
+
+    def _available_current(self, draws):
+        """Return the current in A the chargers may use together."""
+        available = _number(self.config["supply_current"])
+        if meter_entity := self.config.get("meter_entity"):
+            state = self.hass.states.get(meter_entity)
+            if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+                _LOGGER.debug(f"House meter {meter_entity} unavailable, assuming no house load")
+            else:
+                house_load = max(_number(state.state) - sum(draws.values()), 0)
+                available -= house_load
+        return available
+
+    async def async_rebalance(self):
+        """Compute new limits and send them to the chargers."""
+        async with self._lock:
+            demands = []
+            draws = {}
+            coordinators = {}
+            for entry_id, coordinator in self.fleet.coordinators.items():
+                data = coordinator.data
+                if not data or not coordinator.last_update_success:
+                    continue
+                draws[entry_id] = charger_draw(data)
+                wants_power = data.vehicle_state in (2, 3) and (data.evse_state or self._resumable(coordinator))
+                if not wants_power:
+                    continue
+                max_current = data.max_current or 0
+                if coordinator.scheduler.limit is not None:
+                    # A running charging schedule caps what the charger gets
+                    max_current = min(max_current, coordinator.scheduler.limit)
+                coordinators[entry_id] = coordinator
+                demands.append(ChargerDemand(
+                    entry_id,
+                    max_current,
+                    coordinator.config_entry.options.get(CONF_PRIORITY, 0),
+                    data.vehicle_state == 3,
+                ))
+
+            self.allocation = allocate(demands, self._available_current(draws), self.config["mode"])
+            paused = set(self._paused)
+            await asyncio.gather(*(
+                self._async_apply(coordinators[entry_id], current)
+                for entry_id, current in self.allocation.items()
+            ))
+            if self._paused != paused:
+                await self._async_save()
+
+    def _resumable(self, coordinator):
+        """Return True if the manager or the charger's schedule paused it."""
+        entry_id = coordinator.config_entry.entry_id
+        return entry_id not in self._disabled and (entry_id in self._paused or coordinator.scheduler.paused)
+
+    async def _async_apply(self, coordinator, current):
+        """Apply one charger's limit, pausing it if it gets nothing."""
+        entry_id = coordinator.config_entry.entry_id
+        try:
+            # Chargers switched off by their users are not switched back on
+            await coordinator.async_apply_current(current, resume=self._resumable(coordinator))
+            if current < MIN_CHARGING_CURRENT:
+                # A disabled charger that was switched on at the controller stays off
+                if entry_id not in self._disabled:
+                    self._paused.add(entry_id)
+            else:
+                self._paused.discard(entry_id)
+        except EVSEError as e:
+            _LOGGER.warning(f"Load balancing could not update {coordinator.name}: {e}")
+
+    def as_dict(self):
+        """Return configuration and latest allocation."""
+        return {
+            **self.config,
+            "allocation": dict(self.allocation),
+            "paused": sorted(self._paused),
+            "disabled": sorted(self._disabled),
+        }
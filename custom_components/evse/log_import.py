@@ -0,0 +1,185 @@
+"""Incremental import of the controller's charging log into statistics."""
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .api import EVSEError
+from .const import (
+    DOMAIN,
+    LOG_IMPORT_BATCH,
+    LOG_STORAGE_KEY,
+    LOG_STORAGE_VERSION,
+    LOG_SYNC_DELAY,
+    LOG_SYNC_INTERVAL,
+)
+from .statistics import statistic_prefix
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class LogRecord:
+    """One entry of the on-device charging log."""
+
+    timestamp: int
+    uid: str
+    user: str
+    duration: int
+    energy: float
+
+    @property
+    def key(self):
+        """Return what tells records with the same timestamp apart."""
+        return f"{self.uid}/{self.duration}/{self.energy}"
+
+
+def parse_log_record(raw):
+    """Return a LogRecord, or None if the entry has no usable timestamp."""
+    try:
+        timestamp = int(raw["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    try:
+        energy = float(raw.get("energy") or 0)
+    except (TypeError, ValueError):
+        energy = 0.0
+    try:
+        duration = int(raw.get("duration") or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    return LogRecord(timestamp, str(raw.get("uid") or ""), str(raw.get("username") or ""), duration, energy)
+
+
+def hour_start(timestamp):
+    """Return the UTC hour a unix timestamp falls into."""
+    return datetime.fromtimestamp(timestamp - timestamp % 3600, tz=timezone.utc)
+
+
+class EVSELogImporter:
+    """Backfill the charged energy from /getLog into a long-term statistic.
+
+    The firmware always returns the complete log, so the importer streams
+    it and skips every record at or below a stored high-water mark without
+    building more than that one record. New energy is summed per hour and
+    written with one async_add_external_statistics call per batch. A sync
+    runs at startup, shortly after every charging session and every few
+    hours, so the statistic is complete again after an outage.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        """Initialize the importer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        entry = coordinator.config_entry
+        self.statistic_id = f"{statistic_prefix(entry.entry_id)}_log_energy"
+        self._name = entry.data['name']
+        self._store = Store(hass, LOG_STORAGE_VERSION, f"{LOG_STORAGE_KEY}.{entry.entry_id}")
+        # Statistic written to, newest imported timestamp, the records seen at it and the energy sum
+        self._mark = {"statistic_id": self.statistic_id, "timestamp": 0, "keys": [], "sum": 0.0, "hour_sum": 0.0}
+        self._syncing = False
+        self._unsub_interval = None
+        self._unsub_delayed = None
+
+    async def async_load(self):
+        """Restore the high-water mark and start the periodic sync."""
+        stored = await self._store.async_load()
+        if stored is not None and stored.get("statistic_id") == self.statistic_id:
+            self._mark.update(stored)
+        # Otherwise the whole log is imported again, e.g. into the statistic
+        # that replaced one named after the charger
+        self._unsub_interval = async_track_time_interval(
+            self.hass, self._async_scheduled_sync, timedelta(seconds=LOG_SYNC_INTERVAL)
+        )
+        self.async_schedule_sync()
+
+    @callback
+    def async_schedule_sync(self):
+        """Sync a little later, once the controller has written its log entry."""
+        if self._unsub_delayed is not None:
+            self._unsub_delayed()
+        self._unsub_delayed = async_call_later(self.hass, LOG_SYNC_DELAY, self._async_delayed_sync)
+
+    async def _async_delayed_sync(self, _now):
+        """Run the sync scheduled by async_schedule_sync."""
+        self._unsub_delayed = None
+        await self._async_scheduled_sync()
+
+    async def _async_scheduled_sync(self, _now=None):
+        """Run a sync from a timer."""
+        try:
+            await self.async_sync()
+        except EVSEError as e:
+            _LOGGER.debug(f"Could not read the charging log of {self._name}: {e}")
+
+    async def async_sync(self):
+        """Import the log records newer than the high-water mark."""
+        if self._syncing or not self.coordinator.health.allow_request():
+            return 0
+        self._syncing = True
+        try:
+            records = []
+            mark = self._mark["timestamp"]
+            seen = Counter(self._mark["keys"])
+            async for raw in self.coordinator.client.iter_log():
+                record = parse_log_record(raw)
+                if record is None or record.timestamp < mark:
+                    continue
+                if record.timestamp == mark and seen[record.key] > 0:
+                    # Already imported, count down in case of identical records
+                    seen[record.key] -= 1
+                    continue
+                records.append(record)
+            if records:
+                await self._async_import(sorted(records, key=lambda record: record.timestamp))
+            return len(records)
+        finally:
+            self._syncing = False
+
+    async def _async_import(self, records):
+        """Add the energy of new records to the hourly statistic."""
+        mark = self._mark
+        last_hour = hour_start(mark["timestamp"]) if mark["timestamp"] else None
+        hours = {}
+        for record in records:
+            hour = hour_start(record.timestamp)
+            if hour != last_hour:
+                mark["hour_sum"] = 0.0
+                last_hour = hour
+            mark["sum"] += record.energy
+            mark["hour_sum"] += record.energy
+            # Rewriting the newest known hour replaces its row with the new sum
+            hours[hour] = StatisticData(start=hour, state=mark["hour_sum"], sum=mark["sum"])
+            if record.timestamp != mark["timestamp"]:
+                mark["timestamp"] = record.timestamp
+                mark["keys"] = []
+            mark["keys"].append(record.key)
+
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{self._name} charging log energy",
+            source=DOMAIN,
+            statistic_id=self.statistic_id,
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        rows = list(hours.values())
+        for index in range(0, len(rows), LOG_IMPORT_BATCH):
+            async_add_external_statistics(self.hass, metadata, rows[index:index + LOG_IMPORT_BATCH])
+        await self._store.async_save(mark)
+        _LOGGER.debug(f"Imported {len(records)} charging log records of {self._name} into {len(rows)} hours")
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the pending syncs."""
+        for unsub in (self._unsub_interval, self._unsub_delayed):
+            if unsub is not None:
+                unsub()
+        self._unsub_interval = self._unsub_delayed = None
@@ -0,0 +1,143 @@
+"""Bounded per-charger metrics of the request and update path."""
+import time
+from collections import Counter, deque
+
+from .const import METRIC_SAMPLES
+
+# Upper bounds in ms of the latency histogram buckets, the last one is open
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+ERROR_HTTP = "http"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_INVALID = "invalid"
+
+
+def percentile(samples, fraction):
+    """Return the nearest-rank percentile of samples, or None if empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class EndpointMetrics:
+    """Attempt and failure counts, latency histogram and recent latencies of one endpoint."""
+
+    __slots__ = ("requests", "failures", "buckets", "recent")
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.requests = 0
+        self.failures = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = deque(maxlen=METRIC_SAMPLES)
+
+    def add(self, latency, failed=False):
+        """Record the latency in seconds of one attempt, failed or not."""
+        self.requests += 1
+        if failed:
+            self.failures += 1
+        latency_ms = latency * 1000
+        self.recent.append(latency_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency_ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self):
+        """Return the endpoint metrics as a dict."""
+        p50 = percentile(self.recent, 0.5)
+        p99 = percentile(self.recent, 0.99)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_p50_ms": None if p50 is None else round(p50, 1),
+            "latency_p99_ms": None if p99 is None else round(p99, 1),
+            "histogram_ms": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class ChargerMetrics:
+    """Hot path metrics of one charger.
+
+    Counters only grow and every sample series lives in a deque of
+    METRIC_SAMPLES entries, so memory stays bounded however long Home
+    Assistant runs.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.endpoints = {}
+        self.errors = Counter()
+        self.parse_times = deque(maxlen=METRIC_SAMPLES)
+        self.writes_per_cycle = deque(maxlen=METRIC_SAMPLES)
+        self.last_success = None
+        self._writes = 0
+
+    def record_request(self, endpoint, latency, error=None):
+        """Record a request attempt, error is the failure kind if it failed."""
+        if (metrics := self.endpoints.get(endpoint)) is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.add(latency, failed=error is not None)
+        if error is not None:
+            self.errors[error] += 1
+
+    def record_error(self, code):
+        """Count an error by E0..E3 response code or failure kind."""
+        self.errors[code] += 1
+
+    def record_parse(self, seconds):
+        """Record the time spent parsing a snapshot."""
+        self.parse_times.append(seconds * 1000)
+
+    def record_snapshot(self):
+        """Remember that a good snapshot arrived now."""
+        self.last_success = time.monotonic()
+
+    def count_write(self):
+        """Count one entity state write of the current cycle."""
+        self._writes += 1
+
+    def start_cycle(self):
+        """Close the write count of the previous update cycle."""
+        self.writes_per_cycle.append(self._writes)
+        self._writes = 0
+
+    @property
+    def snapshot_age(self):
+        """Return the seconds since the last good snapshot, or None."""
+        return None if self.last_success is None else time.monotonic() - self.last_success
+
+    @property
+    def error_count(self):
+        """Return the number of errors of all kinds."""
+        return sum(self.errors.values())
+
+    @property
+    def mean_writes(self):
+        """Return the mean state writes per update cycle."""
+        return sum(self.writes_per_cycle) / len(self.writes_per_cycle) if self.writes_per_cycle else None
+
+    def latency(self, endpoint, fraction):
+        """Return a latency percentile of an endpoint in ms, or None."""
+        metrics = self.endpoints.get(endpoint)
+        return None if metrics is None else percentile(metrics.recent, fraction)
+
+    def as_dict(self):
+        """Return all metrics as a dict."""
+        parse_p50 = percentile(self.parse_times, 0.5)
+        age = self.snapshot_age
+        return {
+            "endpoints": {endpoint: metrics.as_dict() for endpoint, metrics in self.endpoints.items()},
+            "errors": dict(self.errors),
+            "parse_time_p50_ms": None if parse_p50 is None else round(parse_p50, 3),
+            "state_writes_per_cycle": None if self.mean_writes is None else round(self.mean_writes, 2),
+            "recent_state_writes": list(self.writes_per_cycle),
+            "seconds_since_good_snapshot": None if age is None else round(age, 1),
+        }
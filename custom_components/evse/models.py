@@ -0,0 +1,120 @@
+"""Typed parameter snapshot of a SimpleEVSE-WiFi controller."""
+from dataclasses import dataclass
+
+VEHICLE_STATES = {
+    1: "Ready",
+    2: "Connected",
+    3: "Charging",
+    5: "Error",
+}
+
+VEHICLE_STATE_ICONS = {
+    "Ready": "mdi:ev-station",
+    "Connected": "mdi:car-connected",
+    "Charging": "mdi:car-electric",
+    "Error": "mdi:alert-circle",
+    "Unknown": "mdi:help-circle",
+}
+
+
+def _int(value):
+    """Return value as int, or None if it is not a number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    """Return value as float, or None if it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value):
+    """Return value as bool, accepting the firmware's string forms."""
+    if isinstance(value, str):
+        return value.lower() in ("true", "1")
+    return None if value is None else bool(value)
+
+
+def _str(value):
+    """Return value as str, or None if missing."""
+    return None if value is None else str(value)
+
+
+# /getParameters key, EVSEParameters field and parser, in firmware order
+PARAMETERS = (
+    ("vehicleState", "vehicle_state", _int),
+    ("evseState", "evse_state", _bool),
+    ("maxCurrent", "max_current", _int),
+    ("actualCurrent", "actual_current", _int),
+    ("actualCurrentMA", "actual_current_ma", _int),
+    ("actualPower", "actual_power", _float),
+    ("duration", "duration", _int),
+    ("alwaysActive", "always_active", _bool),
+    ("lastActionUser", "last_action_user", _str),
+    ("lastActionUID", "last_action_uid", _str),
+    ("energy", "energy", _float),
+    ("mileage", "mileage", _float),
+    ("meterReading", "meter_reading", _float),
+    ("currentP1", "current_p1", _float),
+    ("currentP2", "current_p2", _float),
+    ("currentP3", "current_p3", _float),
+    ("voltageP1", "voltage_p1", _float),
+    ("voltageP2", "voltage_p2", _float),
+    ("voltageP3", "voltage_p3", _float),
+    ("useMeter", "use_meter", _bool),
+    ("RFIDUID", "rfid_uid", _str),
+)
+
+PARAMETER_FIELDS = {key: field for key, field, _ in PARAMETERS}
+
+
+@dataclass(slots=True, frozen=True)
+class EVSEParameters:
+    """One /getParameters response, parsed once into typed values."""
+
+    vehicle_state: int | None = None
+    evse_state: bool | None = None
+    max_current: int | None = None
+    actual_current: int | None = None
+    actual_current_ma: int | None = None
+    actual_power: float | None = None
+    duration: int | None = None
+    always_active: bool | None = None
+    last_action_user: str | None = None
+    last_action_uid: str | None = None
+    energy: float | None = None
+    mileage: float | None = None
+    meter_reading: float | None = None
+    current_p1: float | None = None
+    current_p2: float | None = None
+    current_p3: float | None = None
+    voltage_p1: float | None = None
+    voltage_p2: float | None = None
+    voltage_p3: float | None = None
+    use_meter: bool | None = None
+    rfid_uid: str | None = None
+    vehicle_state_name: str = "Unknown"
+
+    @classmethod
+    def from_dict(cls, raw):
+        """Parse the parameter dict of a /getParameters response."""
+        values = {field: parse(raw.get(key)) for key, field, parse in PARAMETERS}
+        return cls(vehicle_state_name=VEHICLE_STATES.get(values["vehicle_state"], "Unknown"), **values)
+
+    def as_dict(self):
+        """Return the snapshot keyed like /getParameters."""
+        return {key: getattr(self, field) for key, field, _ in PARAMETERS}
+
+    def merged(self, update):
+        """Return a new snapshot with the /getParameters keys in update applied."""
+        return EVSEParameters.from_dict({**self.as_dict(), **update})
+
+    @property
+    def charging(self):
+        """Return True if the snapshot shows an active charging session."""
+        return self.vehicle_state == 3 or (self.actual_power or 0) > 0
@@ -0,0 +1,198 @@
+"""Charging plans from a price or PV surplus forecast."""
+import math
+from dataclasses import dataclass
+from datetime import datetime
+
+from .const import MIN_CHARGING_CURRENT
+
+MODE_PRICE = "price"
+MODE_SURPLUS = "surplus"
+
+VOLTAGE = 230
+
+# Price difference per kWh below which slots count as equally cheap
+PRICE_TOLERANCE = 0.01
+
+# Keys used by common price and PV forecast integrations for slot lists
+_LIST_KEYS = ("raw_today", "raw_tomorrow", "prices", "forecast", "detailedForecast", "data")
+_START_KEYS = ("start", "start_time", "startsAt", "period_start", "from", "datetime")
+_END_KEYS = ("end", "end_time", "endsAt", "period_end", "till", "to")
+_VALUE_KEYS = ("value", "price", "total", "pv_estimate", "marketprice", "power")
+
+
+@dataclass(slots=True, frozen=True)
+class ForecastSlot:
+    """Price in any currency per kWh, or PV surplus in kW, for [start, end)."""
+
+    start: float
+    end: float
+    value: float
+
+
+@dataclass(slots=True, frozen=True)
+class PlanStep:
+    """Charging current for [start, end), 0 means the EVSE is off."""
+
+    start: float
+    end: float
+    current: int
+
+    def as_dict(self):
+        """Return the step as a dict."""
+        return {"start": self.start, "end": self.end, "current": self.current}
+
+
+def kw_per_ampere(phases):
+    """Return the charging power in kW per ampere of charging current."""
+    return VOLTAGE * phases / 1000
+
+
+def _timestamp(value):
+    """Return an ISO string, datetime or number as a unix timestamp, or None."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_forecast(attributes, default_slot=3600):
+    """Return the sorted forecast slots found in a sensor's attributes.
+
+    Lists of dicts with a start time and a value, as used by most tariff
+    and PV forecast integrations, are understood, as well as dicts that map
+    a time to a value (in W, as forecast.solar does for "watts"). Slots
+    without an end last until the next slot starts.
+    """
+    raw = []
+    for key in _LIST_KEYS:
+        for item in attributes.get(key) or ():
+            if not isinstance(item, dict):
+                continue
+            start = next((_timestamp(item[k]) for k in _START_KEYS if k in item), None)
+            end = next((_timestamp(item[k]) for k in _END_KEYS if k in item), None)
+            value = next((item[k] for k in _VALUE_KEYS if item.get(k) is not None), None)
+            if start is not None and isinstance(value, (int, float)):
+                raw.append((start, end, float(value)))
+    if not raw and isinstance(watts := attributes.get("watts"), dict):
+        raw = [(_timestamp(when), None, value / 1000) for when, value in watts.items()]
+        raw = [slot for slot in raw if slot[0] is not None]
+
+    raw.sort(key=lambda slot: slot[0])
+    slots = []
+    for index, (start, end, value) in enumerate(raw):
+        if end is None:
+            end = raw[index + 1][0] if index + 1 < len(raw) else start + default_slot
+        if end > start and (not slots or start >= slots[-1].end):
+            slots.append(ForecastSlot(start, end, value))
+    return slots
+
+
+def _clip(slots, now, deadline):
+    """Return the slots cut to [now, deadline)."""
+    clipped = []
+    for slot in slots:
+        start, end = max(slot.start, now), min(slot.end, deadline)
+        if end > start:
+            clipped.append(ForecastSlot(start, end, slot.value))
+    return clipped
+
+
+def _merge(steps):
+    """Join neighbouring steps with the same current, so no command is sent between them."""
+    merged = []
+    for step in sorted(steps, key=lambda step: step.start):
+        if merged and merged[-1].current == step.current and merged[-1].end >= step.start:
+            merged[-1] = PlanStep(merged[-1].start, max(merged[-1].end, step.end), step.current)
+        else:
+            merged.append(step)
+    return merged
+
+
+def _fill(slots, energy, max_current, phases, order):
+    """Charge in the slots in the given order until energy kWh are planned.
+
+    Every slot holds max_current for its whole length. The last slot that
+    is needed only partly gets a lower current instead of a shorter run,
+    but never less than the minimum charging current.
+    """
+    per_ampere = kw_per_ampere(phases)
+    steps = []
+    remaining = energy
+    for slot in sorted(slots, key=order):
+        if remaining <= 0:
+            break
+        hours = (slot.end - slot.start) / 3600
+        current = min(max_current, max(MIN_CHARGING_CURRENT, math.ceil(remaining / (hours * per_ampere))))
+        steps.append(PlanStep(slot.start, slot.end, current))
+        remaining -= current * per_ampere * hours
+    return steps, max(remaining, 0.0)
+
+
+def plan_price(slots, energy, now, deadline, max_current, phases=3, tolerance=PRICE_TOLERANCE):
+    """Return the cheapest plan that charges energy kWh before deadline.
+
+    Charging power is linear in the current, so filling the cheapest
+    slots first is optimal. Prices closer than tolerance are treated as
+    equal and taken in time order, which keeps the plan in few long runs
+    and costs at most tolerance per kWh more than the optimum. Sorting
+    dominates: O(n log n) in the slots. Returns the plan and the energy
+    that did not fit before the deadline.
+    """
+    slots = _clip(slots, now, deadline)
+    order = (lambda slot: (round(slot.value / tolerance), slot.start)) if tolerance else (lambda slot: (slot.value, slot.start))
+    steps, missing = _fill(slots, energy, max_current, phases, order)
+    return _merge(steps), missing
+
+
+def plan_surplus(slots, energy, now, deadline, max_current, phases=3):
+    """Return a plan that follows the PV surplus and tops up from the grid.
+
+    Every slot charges with the current its forecast surplus covers, if that
+    reaches the minimum charging current. Energy the surplus cannot supply
+    before the deadline is planned at full current in the latest slots still
+    free, so the car is full on time but the grid is used as late as possible.
+    """
+    slots = _clip(slots, now, deadline)
+    per_ampere = kw_per_ampere(phases)
+    steps = []
+    free = []
+    remaining = energy
+    for slot in sorted(slots, key=lambda slot: slot.start):
+        current = min(max_current, int(slot.value / per_ampere))
+        if remaining > 0 and current >= MIN_CHARGING_CURRENT:
+            steps.append(PlanStep(slot.start, slot.end, current))
+            remaining -= current * per_ampere * (slot.end - slot.start) / 3600
+        else:
+            free.append(slot)
+    if remaining > 0:
+        top_up, remaining = _fill(free, remaining, max_current, phases, lambda slot: -slot.start)
+        steps += top_up
+    return _merge(steps), max(remaining, 0.0)
+
+
+def current_at(plan, when):
+    """Return the planned current at a time, 0 outside of the plan."""
+    for step in plan:
+        if step.start <= when < step.end:
+            return step.current
+    return 0
+
+
+def plan_cost(plan, slots, phases=3):
+    """Return energy in kWh and cost of a plan under the given price slots."""
+    per_ampere = kw_per_ampere(phases)
+    energy = cost = 0.0
+    for step in plan:
+        for slot in slots:
+            overlap = min(step.end, slot.end) - max(step.start, slot.start)
+            if overlap > 0:
+                kwh = step.current * per_ampere * overlap / 3600
+                energy += kwh
+                cost += kwh * slot.value
+    return energy, cost
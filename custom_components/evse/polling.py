@@ -0,0 +1,80 @@
+"""Adaptive poll interval driven by the charger state."""
+import time
+
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    POLL_BOOST_DURATION,
+    POLL_BOOST_INTERVAL,
+    POLL_HYSTERESIS_SAMPLES,
+)
+
+MODE_IDLE = "idle"
+MODE_CONNECTED = "connected"
+MODE_CHARGING = "charging"
+MODE_BOOST = "boost"
+
+
+class PollingPolicy:
+    """Pick the poll interval from vehicleState, evseState and actualPower.
+
+    The interval tightens as soon as a faster mode is seen and only relaxes
+    after ``hysteresis`` consecutive snapshots agree on a slower mode, so a
+    charger flapping between states does not flap its poll rate as well.
+    Right after a command the policy polls fast for a short boost window.
+    """
+
+    def __init__(self, idle_interval, charging_interval, hysteresis=POLL_HYSTERESIS_SAMPLES):
+        """Initialize the policy."""
+        self._intervals = {
+            MODE_IDLE: idle_interval,
+            MODE_CONNECTED: min(max(DEFAULT_SCAN_INTERVAL, charging_interval), idle_interval),
+            MODE_CHARGING: charging_interval,
+        }
+        self._hysteresis = hysteresis
+        self._mode = MODE_CONNECTED
+        self._pending_mode = None
+        self._pending_count = 0
+        self._boost_until = 0.0
+
+    @property
+    def mode(self):
+        """Return the active polling mode."""
+        if time.monotonic() < self._boost_until:
+            return MODE_BOOST
+        return self._mode
+
+    @property
+    def interval(self):
+        """Return the seconds until the next poll."""
+        if time.monotonic() < self._boost_until:
+            return min(POLL_BOOST_INTERVAL, self._intervals[MODE_CHARGING])
+        return self._intervals[self._mode]
+
+    def boost(self):
+        """Poll fast for a while, e.g. after setStatus or setCurrent."""
+        self._boost_until = time.monotonic() + POLL_BOOST_DURATION
+
+    def update(self, params):
+        """Feed a new parameter snapshot into the policy."""
+        if params.charging:
+            mode = MODE_CHARGING
+        elif params.vehicle_state == 2:
+            mode = MODE_CONNECTED
+        else:
+            mode = MODE_IDLE
+
+        if self._intervals[mode] <= self._intervals[self._mode]:
+            # Tighten at once so the start of a session is not missed
+            self._mode = mode
+            self._pending_mode = None
+            self._pending_count = 0
+            return
+
+        if mode != self._pending_mode:
+            self._pending_mode = mode
+            self._pending_count = 0
+        self._pending_count += 1
+        if self._pending_count >= self._hysteresis:
+            self._mode = mode
+            self._pending_mode = None
+            self._pending_count = 0
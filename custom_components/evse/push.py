@@ -0,0 +1,134 @@
+"""WebSocket listener that pushes controller status into the coordinator."""
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+
+from .api import EVSEConnectionError, decode_ws_frame
+from .const import PUSH_BACKOFF_MAX, PUSH_BACKOFF_MIN, PUSH_FRAME_TIMEOUT, PUSH_REQUEST_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EVSEPushListener:
+    """Keep a WebSocket to one controller open and feed its frames to the coordinator.
+
+    Lost connections are retried with exponential backoff and jitter. The
+    status frame is requested periodically, the firmware only sends it
+    unasked after commands. While the socket is down or no frame arrived
+    for PUSH_FRAME_TIMEOUT seconds the coordinator polls as without push.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        """Initialize the listener."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.connected = False
+        self.last_frame = None
+        self._live = False
+        self._task = None
+        self._ws = None
+
+    @property
+    def live(self):
+        """Return True while status frames keep arriving."""
+        return (
+            self.connected
+            and self.last_frame is not None
+            and time.monotonic() - self.last_frame < PUSH_FRAME_TIMEOUT
+        )
+
+    def start(self):
+        """Start listening in the background."""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"evse push {self.coordinator.config_entry.entry_id}"
+        )
+
+    async def async_stop(self):
+        """Stop listening and close the socket."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+
+    async def _async_run(self):
+        """Connect, listen and reconnect until stopped."""
+        backoff = PUSH_BACKOFF_MIN
+        while True:
+            requester = None
+            try:
+                self._ws = await self.coordinator.client.ws_connect()
+                _LOGGER.debug(f"WebSocket connected to {self.coordinator.name}")
+                backoff = PUSH_BACKOFF_MIN
+                self._set_connected(True)
+                requester = self.hass.async_create_background_task(
+                    self._async_request(self._ws), f"evse push request {self.coordinator.config_entry.entry_id}"
+                )
+                await self._async_listen(self._ws)
+            except EVSEConnectionError as e:
+                _LOGGER.debug(f"WebSocket unavailable for {self.coordinator.name}: {e}")
+            except Exception as e:
+                _LOGGER.debug(f"WebSocket closed for {self.coordinator.name}: {e}")
+            finally:
+                if requester is not None:
+                    requester.cancel()
+                    # Retrieve a send error of the dropped socket instead of leaving it to asyncio
+                    await asyncio.wait((requester,))
+                    if not requester.cancelled() and (error := requester.exception()) is not None:
+                        _LOGGER.debug(f"WebSocket request to {self.coordinator.name} failed: {error}")
+                if self._ws is not None:
+                    await self._ws.close()
+                    self._ws = None
+                self._set_connected(False)
+
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+            backoff = min(backoff * 2, PUSH_BACKOFF_MAX)
+
+    async def _async_listen(self, ws):
+        """Decode frames until the socket closes."""
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+                continue
+            try:
+                update = decode_ws_frame(msg.json())
+            except ValueError:
+                _LOGGER.debug(f"Ignoring malformed WebSocket frame: {msg.data}")
+                continue
+            if update:
+                self.last_frame = time.monotonic()
+                self._check_live()
+                self.coordinator.async_push_update(update)
+
+    async def _async_request(self, ws):
+        """Ask for the status frame periodically and notice when frames stop."""
+        while True:
+            await ws.send_json({"command": "getevsedata"})
+            await asyncio.sleep(min(self.coordinator.policy.interval, PUSH_REQUEST_INTERVAL))
+            self._check_live()
+
+    def _check_live(self):
+        """Reschedule the polls when frames start or stop arriving."""
+        if self.live != self._live:
+            self._live = self.live
+            self.coordinator.fleet.async_reschedule(self.coordinator.config_entry.entry_id)
+
+    def _set_connected(self, connected):
+        """Switch between push mode and poll fallback."""
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if not connected:
+            self.last_frame = None
+        self._check_live()
@@ -0,0 +1,259 @@
+"""Smart charging schedule of one charger, driven by a forecast sensor."""
+import logging
+import time
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time, async_track_state_change_event
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import EVSEError
+from .const import (
+    DATA_LOAD_MANAGER,
+    DOMAIN,
+    FORECAST_WAIT,
+    MIN_CHARGING_CURRENT,
+    SCHEDULE_STORAGE_KEY,
+    SCHEDULE_STORAGE_VERSION,
+)
+from .planner import (
+    MODE_PRICE,
+    MODE_SURPLUS,
+    PlanStep,
+    current_at,
+    kw_per_ampere,
+    parse_forecast,
+    plan_price,
+    plan_surplus,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULE = {
+    "enabled": False,
+    "mode": MODE_PRICE,
+    "forecast_entity": None,
+    "energy": 0.0,
+    "deadline": None,
+    "phases": 3,
+    "baseline": None,
+}
+
+
+class EVSEScheduler:
+    """Charge a target energy before a deadline as cheaply as the forecast allows.
+
+    The plan is recomputed when the forecast entity changes and at every
+    step boundary, from the energy still missing at that time, so a
+    forecast update or a slower car only moves the rest of the plan.
+    Commands go through the charger's command queue like the switch and
+    the slider and are only sent when the planned state differs from the
+    snapshot, so an unchanged plan sends nothing. With load balancing
+    enabled the planned current only caps the charger's allocation and the
+    load manager applies it. Only a charger the schedule paused itself is
+    switched back on.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.config = dict(DEFAULT_SCHEDULE)
+        self.plan = []
+        self.missing = 0.0
+        # Planned current of now while the schedule runs, a cap for load balancing
+        self.limit = None
+        self.paused = False
+        self._forecast = None
+        self._no_forecast_since = None
+        self._store = Store(
+            hass, SCHEDULE_STORAGE_VERSION, f"{SCHEDULE_STORAGE_KEY}.{coordinator.config_entry.entry_id}"
+        )
+        self._unsub_forecast = None
+        self._unsub_timer = None
+
+    async def async_load(self):
+        """Restore a schedule that was running before the restart."""
+        if (stored := await self._store.async_load()) is not None:
+            self.paused = stored.pop("paused", False)
+            self.config.update(stored)
+        if self.config["enabled"]:
+            self._async_start()
+
+    async def _async_save(self):
+        """Persist the configuration and whether the schedule paused the charger."""
+        await self._store.async_save({**self.config, "paused": self.paused})
+
+    async def async_configure(self, **changes):
+        """Update, persist and (re)start the schedule."""
+        if "deadline" in changes and changes["deadline"] is not None:
+            changes["deadline"] = dt_util.as_utc(changes["deadline"]).timestamp()
+        self.config.update(changes)
+        if self.config["enabled"]:
+            # Count the target energy from now on
+            self.config["baseline"] = self._meter()
+        else:
+            self.paused = False
+        await self._async_save()
+        self._async_stop()
+        if self.config["enabled"]:
+            self._async_start()
+        else:
+            self.plan, self.limit = [], None
+
+    def _meter(self):
+        """Return the energy counter the charged energy is measured with."""
+        data = self.coordinator.data
+        if data is None:
+            return None
+        return data.meter_reading if data.meter_reading is not None else data.energy
+
+    def _charged(self):
+        """Return the energy in kWh charged since the schedule started."""
+        meter, baseline = self._meter(), self.config["baseline"]
+        return 0.0 if meter is None or baseline is None else max(meter - baseline, 0.0)
+
+    @callback
+    def _async_start(self):
+        """Follow the forecast entity and plan."""
+        self._forecast = None
+        self._no_forecast_since = None
+        self.limit = None
+        if entity_id := self.config["forecast_entity"]:
+            self._unsub_forecast = async_track_state_change_event(
+                self.hass, [entity_id], self._async_forecast_changed
+            )
+        self._async_replan(force=True)
+
+    @callback
+    def _async_stop(self):
+        """Stop following the forecast and cancel the step timer."""
+        for unsub in (self._unsub_forecast, self._unsub_timer):
+            if unsub is not None:
+                unsub()
+        self._unsub_forecast = self._unsub_timer = None
+
+    @callback
+    def _async_forecast_changed(self, event: Event):
+        """Re-plan when the forecast has changed."""
+        self._async_replan()
+
+    @callback
+    def _async_replan(self, force=False):
+        """Compute the plan for the energy still missing and carry it out."""
+        now = time.time()
+        deadline = self.config["deadline"]
+        if deadline is None or now >= deadline:
+            _LOGGER.info(f"Charging schedule of {self.coordinator.name} reached its deadline")
+            self.hass.async_create_task(self._async_finish())
+            return
+
+        state = self.hass.states.get(self.config["forecast_entity"] or "")
+        slots = parse_forecast(state.attributes) if state is not None else []
+        forecast = tuple(slot for slot in slots if slot.end > now and slot.start < deadline)
+        if not force and forecast == self._forecast:
+            # Another attribute of the sensor changed, the plan still holds
+            return
+        self._forecast = forecast
+
+        remaining = self.config["energy"] - self._charged()
+        if remaining <= 0:
+            _LOGGER.info(f"Charging schedule of {self.coordinator.name} is complete")
+            self.hass.async_create_task(self._async_finish())
+            return
+
+        data = self.coordinator.data
+        max_current = (data.max_current if data is not None else None) or 32
+        planner = plan_surplus if self.config["mode"] == MODE_SURPLUS else plan_price
+        if forecast:
+            self._no_forecast_since = None
+            self.plan, self.missing = planner(forecast, remaining, now, deadline, max_current, self.config["phases"])
+        else:
+            # The forecast sensor may just not be loaded yet, so wait for it
+            # as long as the deadline can still be met at full current
+            if self._no_forecast_since is None:
+                self._no_forecast_since = now
+            latest_start = deadline - remaining / (max_current * kw_per_ampere(self.config["phases"])) * 3600
+            wait_until = min(self._no_forecast_since + FORECAST_WAIT, latest_start)
+            if self.config["forecast_entity"] and now < wait_until:
+                _LOGGER.debug(f"Waiting for the forecast of {self.coordinator.name}")
+                self.plan, self.missing = [], 0.0
+                self._async_wake_at(wait_until)
+                return
+            # Without a forecast the only safe plan is to charge right away
+            _LOGGER.warning(f"No forecast for {self.coordinator.name}, charging now")
+            self.plan, self.missing = [PlanStep(now, deadline, max_current)], 0.0
+        self._async_execute(now)
+
+    @callback
+    def _async_wake_at(self, when):
+        """Re-plan at a unix timestamp, replacing the pending wake-up."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_boundary, dt_util.utc_from_timestamp(when)
+        )
+
+    @callback
+    def _async_execute(self, now):
+        """Apply the step of now and wake up at the next step boundary."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        boundaries = [t for step in self.plan for t in (step.start, step.end) if t > now]
+        if boundaries:
+            self._async_wake_at(min(boundaries))
+        self.limit = current_at(self.plan, now)
+        self.hass.async_create_task(self._async_apply(self.limit))
+
+    @callback
+    def _async_boundary(self, _now):
+        """Re-plan from the actual charged energy at a step boundary."""
+        self._unsub_timer = None
+        self._async_replan(force=True)
+
+    async def _async_apply(self, current):
+        """Bring the charger to the planned current, 0 pauses it."""
+        coordinator = self.coordinator
+        load_manager = self.hass.data[DOMAIN][DATA_LOAD_MANAGER]
+        if coordinator.data is None or load_manager.user_disabled(coordinator.config_entry.entry_id):
+            # Switched off by hand, the schedule waits until it is switched on
+            return
+        was_on = bool(coordinator.tracker.value("evseState", coordinator.data))
+        paused = self.paused
+        try:
+            if current >= MIN_CHARGING_CURRENT and load_manager.config["enabled"]:
+                await load_manager.async_rebalance()
+            else:
+                await coordinator.async_apply_current(current, resume=self.paused)
+        except EVSEError as e:
+            _LOGGER.warning(f"Charging schedule could not update {coordinator.name}: {e}")
+        if current < MIN_CHARGING_CURRENT:
+            self.paused = self.paused or was_on
+        else:
+            self.paused = self.paused and not coordinator.tracker.value("evseState", coordinator.data)
+        if self.paused != paused:
+            await self._async_save()
+
+    async def _async_finish(self):
+        """Stop charging and switch the schedule off."""
+        self._async_stop()
+        self.plan, self.limit = [], None
+        await self._async_apply(0)
+        self.config["enabled"] = False
+        self.paused = False
+        await self._async_save()
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the listeners, the stored schedule resumes after a restart."""
+        self._async_stop()
+
+    def as_dict(self):
+        """Return configuration and plan."""
+        return {
+            **self.config,
+            "charged_kwh": round(self._charged(), 3),
+            "missing_kwh": round(self.missing, 3),
+            "plan": [step.as_dict() for step in self.plan],
+        }
@@ -1,38 +1,131 @@
-import aiohttp
-import asyncio
-import async_timeout
 import logging
-from homeassistant.components.sensor import SensorEntity
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.exceptions import ConfigEntryNotReady
+from .analytics import ANALYTICS_KEYS
 from .const import DOMAIN
+from .entity import EVSEEntity
+from .metrics import ChargerMetrics
+from .models import PARAMETER_FIELDS, VEHICLE_STATE_ICONS
+from .statistics import STATISTIC_KEYS
 
 _LOGGER = logging.getLogger(__name__)
 
-class EVSESensor(SensorEntity):
+# The vehicle state sensor shows the mapped name instead of the raw code
+SENSOR_FIELDS = {**PARAMETER_FIELDS, "vehicleState": "vehicle_state_name"}
+
+
+@dataclass(frozen=True, kw_only=True)
+class EVSESensorEntityDescription(SensorEntityDescription):
+    """Describes an EVSE sensor by its /getParameters key."""
+
+    suffix: str
+
+
+# Rarely needed values, registered disabled so they are not written at all
+_DIAGNOSTIC = {"entity_category": EntityCategory.DIAGNOSTIC, "entity_registry_enabled_default": False}
+
+SENSOR_DESCRIPTIONS = (
+    EVSESensorEntityDescription(key="actualCurrent", suffix="actual_current", native_unit_of_measurement="A", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="actualPower", suffix="actual_power", native_unit_of_measurement="kW", icon="mdi:lightning-bolt"),
+    EVSESensorEntityDescription(key="duration", suffix="duration", native_unit_of_measurement="Minutes", icon="mdi:clock-time-eight-outline"),
+    EVSESensorEntityDescription(key="vehicleState", suffix="vehicle_state"),
+    EVSESensorEntityDescription(key="maxCurrent", suffix="max_current", native_unit_of_measurement="A", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="actualCurrentMA", suffix="actual_current_ma", native_unit_of_measurement="mA", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="alwaysActive", suffix="always_active", icon="mdi:clock-time-eight-outline"),
+    EVSESensorEntityDescription(key="lastActionUser", suffix="last_action_user"),
+    EVSESensorEntityDescription(key="lastActionUID", suffix="last_action_uid", **_DIAGNOSTIC),
+    EVSESensorEntityDescription(key="energy", suffix="energy", native_unit_of_measurement="kWh", icon="mdi:lightning-bolt"),
+    EVSESensorEntityDescription(key="mileage", suffix="mileage", native_unit_of_measurement="km", icon="mdi:map-marker-distance"),
+    EVSESensorEntityDescription(key="meterReading", suffix="meter_reading", native_unit_of_measurement="kWh", icon="mdi:meter-electric"),
+    EVSESensorEntityDescription(key="currentP1", suffix="current_p1", native_unit_of_measurement="A", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="currentP2", suffix="current_p2", native_unit_of_measurement="A", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="currentP3", suffix="current_p3", native_unit_of_measurement="A", icon="mdi:current-ac"),
+    EVSESensorEntityDescription(key="voltageP1", suffix="voltage_p1", native_unit_of_measurement="V", icon="mdi:lightning-bolt"),
+    EVSESensorEntityDescription(key="voltageP2", suffix="voltage_p2", native_unit_of_measurement="V", icon="mdi:lightning-bolt"),
+    EVSESensorEntityDescription(key="voltageP3", suffix="voltage_p3", native_unit_of_measurement="V", icon="mdi:lightning-bolt"),
+    EVSESensorEntityDescription(key="useMeter", suffix="use_meter", **_DIAGNOSTIC),
+    EVSESensorEntityDescription(key="RFIDUID", suffix="rfid_uid", **_DIAGNOSTIC),
+)
+
+
+# Figures derived by PhaseAnalytics, the rolling ones over ANALYTICS_WINDOW
+ANALYTICS_DESCRIPTIONS = (
+    EVSESensorEntityDescription(key="phaseImbalance", suffix="phase_imbalance", native_unit_of_measurement="%", icon="mdi:scale-unbalanced"),
+    EVSESensorEntityDescription(key="activePhases", suffix="active_phases", icon="mdi:sine-wave"),
+    *(
+        EVSESensorEntityDescription(key=f"apparentPowerP{phase}", suffix=f"apparent_power_p{phase}", native_unit_of_measurement="kVA", icon="mdi:lightning-bolt")
+        for phase in (1, 2, 3)
+    ),
+    *(
+        EVSESensorEntityDescription(key=f"currentRmsP{phase}", suffix=f"current_rms_p{phase}", native_unit_of_measurement="A", icon="mdi:current-ac", **_DIAGNOSTIC)
+        for phase in (1, 2, 3)
+    ),
+    *(
+        EVSESensorEntityDescription(key=f"currentPeakP{phase}", suffix=f"current_peak_p{phase}", native_unit_of_measurement="A", icon="mdi:current-ac", **_DIAGNOSTIC)
+        for phase in (1, 2, 3)
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class EVSEMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor fed by the charger's ChargerMetrics."""
+
+    suffix: str
+    value_fn: Callable[[ChargerMetrics], float | None]
+    # Polled by the platform, for values that change without an update
+    poll: bool = False
+
+
+def _rounded(value, digits=1):
+    """Return value rounded, keeping None."""
+    return None if value is None else round(value, digits)
+
+
+METRIC_DESCRIPTIONS = (
+    EVSEMetricSensorEntityDescription(
+        key="poll_latency_p50", suffix="poll_latency_p50", native_unit_of_measurement="ms",
+        value_fn=lambda metrics: _rounded(metrics.latency("getParameters", 0.5)), **_DIAGNOSTIC,
+    ),
+    EVSEMetricSensorEntityDescription(
+        key="poll_latency_p99", suffix="poll_latency_p99", native_unit_of_measurement="ms",
+        value_fn=lambda metrics: _rounded(metrics.latency("getParameters", 0.99)), **_DIAGNOSTIC,
+    ),
+    EVSEMetricSensorEntityDescription(
+        key="request_errors", suffix="request_errors",
+        value_fn=lambda metrics: metrics.error_count, **_DIAGNOSTIC,
+    ),
+    EVSEMetricSensorEntityDescription(
+        key="state_writes_per_cycle", suffix="state_writes_per_cycle",
+        value_fn=lambda metrics: _rounded(metrics.mean_writes, 2), **_DIAGNOSTIC,
+    ),
+    EVSEMetricSensorEntityDescription(
+        key="snapshot_age", suffix="snapshot_age", native_unit_of_measurement="s",
+        value_fn=lambda metrics: _rounded(metrics.snapshot_age, 0), poll=True, **_DIAGNOSTIC,
+    ),
+)
+
+class EVSESensor(EVSEEntity, SensorEntity):
     """Representation of an EVSE sensor."""
 
-    def __init__(self, name, ip, port, attribute, unit, friendly_name, entry_id, unique_id, icon=None):
+    entity_description: EVSESensorEntityDescription
+
+    def __init__(self, coordinator, description, name, entry_id, unique_id):
         """Initialize the sensor."""
-        self._name = name
-        self._ip = ip
-        self._port = port
-        self._attribute = attribute
-        self._unit = unit
-        self._friendly_name = friendly_name
-        self._icon = icon
-        self._state = None
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._name = f"{name}_{description.suffix}"
+        self._attribute = description.key
+        self._field = SENSOR_FIELDS.get(description.key)
         self._attr_unique_id = f"{unique_id}_{self._attribute}"
-        self._entry_id = entry_id
-
-    @property
-    def device_info(self):
-        """Return device information."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-        }
+        self._watched_keys = (description.key,)
+        self._update_from_data(coordinator.data)
 
     @property
     def name(self):
@@ -40,114 +133,80 @@ class EVSESensor(SensorEntity):
         return self._name
 
     @property
-    def state(self):
+    def native_value(self):
         """Return the state of the sensor."""
-        if self._attribute == "vehicleState":
-            return self._map_vehicle_state(self._state)
         return self._state
 
+    def _update_from_data(self, data):
+        """Take the pre-parsed value from the shared parameter snapshot."""
+        if self._attribute in ANALYTICS_KEYS:
+            self._state = self.coordinator.analytics.values[self._attribute]
+        elif self._attribute in STATISTIC_KEYS:
+            # Either the polled value or the mean of the last minute
+            self._state = self.coordinator.statistics.value(self._attribute, data)
+        else:
+            self._state = getattr(data, self._field)
+        if self._attribute == "vehicleState":
+            self._attr_icon = VEHICLE_STATE_ICONS.get(self._state, "mdi:help-circle")
+
+class EVSEMetricSensor(EVSEEntity, SensorEntity):
+    """Diagnostic sensor showing one of the charger's hot path metrics."""
+
+    entity_description: EVSEMetricSensorEntityDescription
+
+    def __init__(self, coordinator, description, name, entry_id, unique_id):
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._name = f"{name}_{description.suffix}"
+        self._attr_unique_id = f"{unique_id}_{description.key}"
+        self._state = description.value_fn(coordinator.metrics)
+
     @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return self._unit
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
 
     @property
-    def icon(self):
-        """Return the icon of the sensor."""
-        if self._attribute == "vehicleState":
-            return self._get_vehicle_state_icon()
-        return self._icon
-
-    def _map_vehicle_state(self, value):
-        """Map vehicle state codes to human-readable values."""
-        mapper = {
-            1: "Ready",
-            2: "Connected",
-            3: "Charging",
-            5: "Error"
-        }
-        return mapper.get(value, "Unknown")
-
-    def _get_vehicle_state_icon(self):
-        """Return the icon based on the vehicle state."""
-        state = self._map_vehicle_state(self._state)
-        icon_mapper = {
-            "Ready": "mdi:ev-station",
-            "Connected": "mdi:car-connected",
-            "Charging": "mdi:car-electric",
-            "Error": "mdi:alert-circle",
-            "Unknown": "mdi:help-circle"
-        }
-        return icon_mapper.get(state, "mdi:help-circle")
+    def available(self):
+        """Stay available, the metrics matter most while the charger is not."""
+        return True
+
+    @property
+    def should_poll(self):
+        """Poll the metrics that age between coordinator updates."""
+        return self.entity_description.poll
 
     async def async_update(self):
-        """Fetch new state data for the sensor."""
-        url = f"http://{self._ip}:{self._port}/getParameters"
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with async_timeout.timeout(10):
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            self._state = data["list"][0].get(self._attribute)
-                        else:
-                            _LOGGER.error(f"Error fetching data from {url}: HTTP status {response.status}")
-                            self._state = None
-        except aiohttp.ClientConnectorError as e:
-            _LOGGER.error(f"Connection error for {url}: {e}")
-            self._state = None
-        except asyncio.TimeoutError:
-            _LOGGER.error(f"Timeout error for {url}")
-            self._state = None
-        except Exception as e:
-            _LOGGER.error(f"Unexpected error fetching data from {url}: {e}")
-            self._state = None
+        """Re-read the metric instead of refreshing the coordinator."""
+        self._state = self.entity_description.value_fn(self.coordinator.metrics)
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._state
+
+    def _snapshot_changed(self):
+        """Write only when the metric moved."""
+        return self.entity_description.value_fn(self.coordinator.metrics) != self._state
+
+    def _update_from_data(self, data):
+        """Read the metric, the snapshot itself is not used."""
+        self._state = self.entity_description.value_fn(self.coordinator.metrics)
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     """Set up the EVSE sensors from a config entry."""
-    ip = config_entry.data['ip_address']
-    port = config_entry.data['port']
     name = config_entry.data['name']
     entry_id = config_entry.entry_id
     unique_id = config_entry.unique_id
 
-    # Test connection before setting up entities
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with async_timeout.timeout(10):
-                async with session.get(f"http://{ip}:{port}/getParameters") as response:
-                    if response.status != 200:
-                        raise ConfigEntryNotReady(f"EVSE device returned status {response.status}")
-    except aiohttp.ClientConnectorError as e:
-        raise ConfigEntryNotReady(f"Failed to connect to EVSE device: {e}")
-    except asyncio.TimeoutError:
-        raise ConfigEntryNotReady("Connection to EVSE device timed out")
-
-    # Create sensor entities
+    # The coordinator already holds the snapshot of the setup probe
+    coordinator = hass.data[DOMAIN][entry_id]
     sensors = [
-        EVSESensor(f"{name}_actual_current", ip, port, "actualCurrent", "A", "Actual Current", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_actual_power", ip, port, "actualPower", "kW", "Actual Power", entry_id, unique_id, "mdi:lightning-bolt"),
-        EVSESensor(f"{name}_duration", ip, port, "duration", "Minutes", "Duration", entry_id, unique_id, "mdi:clock-time-eight-outline"),
-        EVSESensor(f"{name}_vehicle_state", ip, port, "vehicleState", None, "Vehicle State", entry_id, unique_id),
-        EVSESensor(f"{name}_max_current", ip, port, "maxCurrent", "A", "Max Current", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_actual_current_ma", ip, port, "actualCurrentMA", "mA", "Actual Current (mA)", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_always_active", ip, port, "alwaysActive", None, "Always Active", entry_id, unique_id, "mdi:clock-time-eight-outline"),
-        EVSESensor(f"{name}_last_action_user", ip, port, "lastActionUser", None, "Last Action User", entry_id, unique_id),
-        EVSESensor(f"{name}_last_action_uid", ip, port, "lastActionUID", None, "Last Action UID", entry_id, unique_id),
-        EVSESensor(f"{name}_energy", ip, port, "energy", "kWh", "Energy", entry_id, unique_id, "mdi:lightning-bolt"),
-        EVSESensor(f"{name}_mileage", ip, port, "mileage", "km", "Mileage", entry_id, unique_id, "mdi:map-marker-distance"),
-        EVSESensor(f"{name}_meter_reading", ip, port, "meterReading", "kWh", "Meter Reading", entry_id, unique_id, "mdi:meter-electric"),
-        EVSESensor(f"{name}_current_p1", ip, port, "currentP1", "A", "Current Phase 1", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_current_p2", ip, port, "currentP2", "A", "Current Phase 2", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_current_p3", ip, port, "currentP3", "A", "Current Phase 3", entry_id, unique_id, "mdi:current-ac"),
-        EVSESensor(f"{name}_voltage_p1", ip, port, "voltageP1", "V", "Voltage Phase 1", entry_id, unique_id, "mdi:lightning-bolt"),
-        EVSESensor(f"{name}_voltage_p2", ip, port, "voltageP2", "V", "Voltage Phase 2", entry_id, unique_id, "mdi:lightning-bolt"),
-        EVSESensor(f"{name}_voltage_p3", ip, port, "voltageP3", "V", "Voltage Phase 3", entry_id, unique_id, "mdi:lightning-bolt"),
-        EVSESensor(f"{name}_use_meter", ip, port, "useMeter", None, "Use Meter", entry_id, unique_id),
-        EVSESensor(f"{name}_rfid_uid", ip, port, "RFIDUID", None, "RFID UID", entry_id, unique_id)
+        EVSESensor(coordinator, description, name, entry_id, unique_id)
+        for description in SENSOR_DESCRIPTIONS + ANALYTICS_DESCRIPTIONS
     ]
-
-    # Add the sensors
-    async_add_entities(sensors, True)
-
-
+    sensors += [
+        EVSEMetricSensor(coordinator, description, name, entry_id, unique_id) for description in METRIC_DESCRIPTIONS
+    ]
+    async_add_entities(sensors)
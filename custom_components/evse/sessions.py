@@ -0,0 +1,319 @@
+"""Charging session detection and compact on-disk session history."""
+import bisect
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import PROFILE_INTERVAL, PROFILE_MAX_SAMPLES, SESSION_DIR
+
+_LOGGER = logging.getLogger(__name__)
+
+FILE_MAGIC = b"EVSS"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+# Record size, start and end time, meter reading at start and end, kWh,
+# peak kW, profile interval in s, profile samples, RFID UID and user name
+RECORD = struct.Struct("<IddddffHH20s32s")
+# One profile sample: mean current per phase in 0.1 A
+SAMPLE = struct.Struct("<HHH")
+
+
+def _encode(text, size):
+    """Return text as a fixed size, NUL padded UTF-8 field."""
+    return (text or "").encode()[:size]
+
+
+def _decode(raw):
+    """Return a NUL padded UTF-8 field as text."""
+    return raw.rstrip(b"\0").decode(errors="replace")
+
+
+@dataclass(slots=True, frozen=True)
+class ChargingSession:
+    """Summary of one finished charging session."""
+
+    start: float
+    end: float
+    meter_start: float
+    meter_end: float
+    energy: float
+    peak_power: float
+    rfid_uid: str
+    user: str
+    profile_interval: int = PROFILE_INTERVAL
+    samples: int = 0
+    offset: int = 0
+
+    @property
+    def duration(self):
+        """Return the session length in seconds."""
+        return self.end - self.start
+
+    def as_dict(self):
+        """Return the session as a dict."""
+        return {
+            "start": self.start,
+            "end": self.end,
+            "rfid_uid": self.rfid_uid,
+            "user": self.user,
+            "energy_kwh": round(self.energy, 3),
+            "meter_start": self.meter_start,
+            "meter_end": self.meter_end,
+            "peak_power_kw": round(self.peak_power, 2),
+            "duration_s": round(self.duration),
+        }
+
+
+class SessionLog:
+    """Append-only binary session file of one charger with an in-memory index.
+
+    The file holds a short header followed by one record per session: a
+    fixed size summary and the downsampled per-phase current profile. Only
+    the summaries are kept in memory, sorted by start time, so range
+    queries are a bisect and profiles are read from disk on demand.
+    The blocking methods must run in the executor.
+    """
+
+    def __init__(self, path):
+        """Initialize the log."""
+        self.path = path
+        self.sessions = []
+        self._starts = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the summaries of all stored sessions."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r+b") as file:
+            magic, version = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                raise ValueError(f"{self.path} is not an EVSE session file")
+            offset = FILE_HEADER.size
+            while len(raw := file.read(RECORD.size)) == RECORD.size:
+                size, start, end, meter_start, meter_end, energy, peak, interval, samples, uid, user = RECORD.unpack(raw)
+                if size != RECORD.size + samples * SAMPLE.size or offset + size > os.fstat(file.fileno()).st_size:
+                    break
+                self.add(ChargingSession(
+                    start, end, meter_start, meter_end, energy, peak,
+                    _decode(uid), _decode(user), interval, samples, offset,
+                ))
+                offset += size
+                file.seek(offset)
+            if offset != file.seek(0, os.SEEK_END):
+                # Drop a record cut short by a crash so the next append lines up
+                _LOGGER.warning(f"Truncating incomplete session record in {self.path}")
+                file.truncate(offset)
+
+    def append(self, session, profile):
+        """Write a session and its profile and return it with its file offset."""
+        record = RECORD.pack(
+            RECORD.size + len(profile) * SAMPLE.size,
+            session.start, session.end, session.meter_start, session.meter_end,
+            session.energy, session.peak_power, session.profile_interval, len(profile),
+            _encode(session.rfid_uid, 20), _encode(session.user, 32),
+        ) + b"".join(SAMPLE.pack(*sample) for sample in profile)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as file:
+                if file.tell() == 0:
+                    file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+                offset = file.tell()
+                file.write(record)
+        return replace(session, samples=len(profile), offset=offset)
+
+    def add(self, session):
+        """Insert a session summary into the index."""
+        index = bisect.bisect_right(self._starts, session.start)
+        self._starts.insert(index, session.start)
+        self.sessions.insert(index, session)
+
+    def range(self, start=None, end=None):
+        """Return the sessions that started in [start, end)."""
+        low = 0 if start is None else bisect.bisect_left(self._starts, start)
+        high = len(self._starts) if end is None else bisect.bisect_left(self._starts, end)
+        return self.sessions[low:high]
+
+    def profile(self, session):
+        """Return the per-phase current profile of a session in A."""
+        with open(self.path, "rb") as file:
+            file.seek(session.offset + RECORD.size)
+            raw = file.read(session.samples * SAMPLE.size)
+        return [tuple(value / 10 for value in sample) for sample in SAMPLE.iter_unpack(raw)]
+
+
+def aggregate(sessions):
+    """Return total and per RFID UID energy, duration and session count."""
+    users = {}
+    for session in sessions:
+        user = users.setdefault(session.rfid_uid or "unknown", {
+            "user": session.user,
+            "sessions": 0,
+            "energy_kwh": 0.0,
+            "duration_h": 0.0,
+        })
+        user["sessions"] += 1
+        user["energy_kwh"] += session.energy
+        user["duration_h"] += session.duration / 3600
+    for user in users.values():
+        user["energy_kwh"] = round(user["energy_kwh"], 3)
+        user["duration_h"] = round(user["duration_h"], 2)
+    return {
+        "sessions": sum(user["sessions"] for user in users.values()),
+        "energy_kwh": round(sum(user["energy_kwh"] for user in users.values()), 3),
+        "users": users,
+    }
+
+
+class _OpenSession:
+    """Running totals and current profile of the session in progress."""
+
+    def __init__(self, now, data):
+        """Start a session from the first snapshot that shows it activated."""
+        # energy and duration count from activation, so a session that was
+        # already running at startup or between two polls keeps its start
+        self.start = now - (data.duration or 0) / 1000
+        self.meter_start = None
+        if data.meter_reading is not None:
+            self.meter_start = data.meter_reading - (data.energy or 0)
+        # Whoever activated the session pays for it, not who resumes it later
+        self.rfid_uid = data.last_action_uid or ""
+        self.user = data.last_action_user or ""
+        self.peak_power = 0.0
+        # Energy of the activations before the current one
+        self.energy_before = 0.0
+        self.last = data
+        self.interval = PROFILE_INTERVAL
+        self.profile = []
+        self._profile_start = now
+        self._bucket_end = now + PROFILE_INTERVAL
+        self._sums = [0.0, 0.0, 0.0]
+        self._count = 0
+
+    def add(self, now, data):
+        """Fold a snapshot into the totals and the profile."""
+        if (data.energy or 0) < (self.last.energy or 0):
+            # Resumed after a pause, the controller counts the energy anew
+            self.energy_before += self.last.energy
+        self.last = data
+        self.peak_power = max(self.peak_power, data.actual_power or 0)
+        while now >= self._bucket_end:
+            self._close_bucket()
+        self._sums[0] += data.current_p1 or 0
+        self._sums[1] += data.current_p2 or 0
+        self._sums[2] += data.current_p3 or 0
+        self._count += 1
+
+    def _close_bucket(self):
+        """Append the mean of the current bucket, repeating the last one for gaps."""
+        if self._count:
+            sample = tuple(min(round(total / self._count * 10), 0xFFFF) for total in self._sums)
+        else:
+            sample = self.profile[-1] if self.profile else (0, 0, 0)
+        self.profile.append(sample)
+        self._sums = [0.0, 0.0, 0.0]
+        self._count = 0
+        self._bucket_end += self.interval
+        if len(self.profile) >= PROFILE_MAX_SAMPLES:
+            # Halve the resolution instead of growing without bound
+            self.profile = [
+                tuple((a + b) // 2 for a, b in zip(*self.profile[i:i + 2]))
+                if i + 1 < len(self.profile) else self.profile[i]
+                for i in range(0, len(self.profile), 2)
+            ]
+            self.interval *= 2
+            self._bucket_end = self._profile_start + (len(self.profile) + 1) * self.interval
+
+    def finish(self, now):
+        """Return the finished session and its profile."""
+        if self._count:
+            self._close_bucket()
+        data = self.last
+        meter_end = data.meter_reading
+        if self.meter_start is not None and meter_end is not None:
+            energy = meter_end - self.meter_start
+        else:
+            energy = self.energy_before + (data.energy or 0.0)
+        session = ChargingSession(
+            start=self.start,
+            end=now,
+            meter_start=self.meter_start or 0.0,
+            meter_end=meter_end or 0.0,
+            energy=max(energy, 0.0),
+            peak_power=self.peak_power,
+            rfid_uid=self.rfid_uid,
+            user=self.user,
+            profile_interval=self.interval,
+        )
+        return session, self.profile
+
+
+class EVSESessionRecorder:
+    """Detect charging sessions in the snapshots of one charger and log them.
+
+    A session starts when the EVSE is first activated with a vehicle
+    plugged in and ends when the vehicle unplugs, so pauses by the user,
+    load balancing or a charging schedule stay inside one session. It is
+    then appended to the charger's session file.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id, name):
+        """Initialize the recorder."""
+        self.hass = hass
+        self.name = name
+        self.log = SessionLog(hass.config.path(SESSION_DIR, f"{entry_id}.bin"))
+        self._open = None
+        self._writes = set()
+
+    async def async_load(self):
+        """Load the session index from disk."""
+        try:
+            await self.hass.async_add_executor_job(self.log.load)
+        except (OSError, ValueError, struct.error) as e:
+            _LOGGER.error(f"Could not read the session history of {self.name}: {e}")
+
+    @callback
+    def async_update(self, data):
+        """Feed a new snapshot into the session detection, return True if a session ended."""
+        now = time.time()
+        if self._open is None:
+            if data.evse_state and data.vehicle_state in (2, 3):
+                self._open = _OpenSession(now, data)
+                self._open.add(now, data)
+        elif data.vehicle_state != 1:
+            self._open.add(now, data)
+        else:
+            session, profile = self._open.finish(now)
+            self._open = None
+            task = self.hass.async_create_task(self._async_write(session, profile))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+            return True
+        return False
+
+    async def _async_write(self, session, profile):
+        """Append a finished session to the file and the index."""
+        try:
+            session = await self.hass.async_add_executor_job(self.log.append, session, profile)
+        except OSError as e:
+            _LOGGER.error(f"Could not store charging session of {self.name}: {e}")
+            return
+        self.log.add(session)
+        _LOGGER.debug(f"Recorded charging session of {self.name}: {session.energy:.2f} kWh")
+
+    def sessions(self, start=None, end=None, rfid_uid=None):
+        """Return the recorded sessions that started in [start, end)."""
+        sessions = self.log.range(start, end)
+        if rfid_uid is not None:
+            sessions = [session for session in sessions if session.rfid_uid == rfid_uid]
+        return sessions
+
+    async def async_shutdown(self):
+        """Wait for sessions still being written."""
+        for task in list(self._writes):
+            await task
@@ -0,0 +1,227 @@
+"""Downsampled long-term statistics of power, phase currents and voltages."""
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import DOMAIN, FIVE_MINUTE_WINDOWS, MINUTE_WINDOWS
+
+_LOGGER = logging.getLogger(__name__)
+
+MINUTE = 60
+FIVE_MINUTES = 300
+HOUR = 3600
+WINDOW_LENGTHS = (MINUTE, FIVE_MINUTES, HOUR)
+
+# Noisy analog keys that are aggregated, with their field and unit
+STATISTIC_FIELDS = {
+    "actualPower": ("actual_power", UnitOfPower.KILO_WATT),
+    "currentP1": ("current_p1", UnitOfElectricCurrent.AMPERE),
+    "currentP2": ("current_p2", UnitOfElectricCurrent.AMPERE),
+    "currentP3": ("current_p3", UnitOfElectricCurrent.AMPERE),
+    "voltageP1": ("voltage_p1", UnitOfElectricPotential.VOLT),
+    "voltageP2": ("voltage_p2", UnitOfElectricPotential.VOLT),
+    "voltageP3": ("voltage_p3", UnitOfElectricPotential.VOLT),
+}
+STATISTIC_KEYS = frozenset(STATISTIC_FIELDS)
+
+
+class Window:
+    """Minimum, mean and maximum of the samples in one time window."""
+
+    __slots__ = ("start", "count", "total", "minimum", "maximum")
+
+    def __init__(self, start):
+        """Initialize an empty window."""
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        """Add a sample."""
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    @property
+    def mean(self):
+        """Return the mean of the samples."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self):
+        """Return the window as a dict."""
+        return {
+            "start": self.start,
+            "min": self.minimum,
+            "mean": None if self.mean is None else round(self.mean, 3),
+            "max": self.maximum,
+        }
+
+
+class StatisticsPipeline:
+    """Fold snapshots into 1 min, 5 min and hourly windows.
+
+    Closed 1 min and 5 min windows are kept in bounded deques together with
+    the energy metered in them. Closed hours are queued for the long-term
+    statistics. Windows are aligned to the wall clock so hours line up
+    with the recorder's statistics.
+    """
+
+    def __init__(self):
+        """Initialize empty windows."""
+        self.minute = deque(maxlen=MINUTE_WINDOWS)
+        self.five_minute = deque(maxlen=FIVE_MINUTE_WINDOWS)
+        self.hours = []
+        self._closed = {MINUTE: self.minute, FIVE_MINUTES: self.five_minute, HOUR: self.hours}
+        self._starts = dict.fromkeys(WINDOW_LENGTHS)
+        self._windows = {length: {} for length in WINDOW_LENGTHS}
+        self._meter_at_start = dict.fromkeys(WINDOW_LENGTHS)
+        self._meter = None
+
+    def add(self, now, data):
+        """Add a snapshot and return the window lengths that closed."""
+        closed = set()
+        for length in WINDOW_LENGTHS:
+            start = now - now % length
+            if start != self._starts[length]:
+                if self._starts[length] is not None:
+                    self._close(length)
+                    closed.add(length)
+                self._starts[length] = start
+                self._windows[length] = {}
+                self._meter_at_start[length] = self._meter
+            windows = self._windows[length]
+            for key, (field, _) in STATISTIC_FIELDS.items():
+                if (value := getattr(data, field)) is not None:
+                    if (window := windows.get(key)) is None:
+                        window = windows[key] = Window(start)
+                    window.add(value)
+        if data.meter_reading is not None:
+            self._meter = data.meter_reading
+        return closed
+
+    def _close(self, length):
+        """Move the current windows of a length to the closed ones."""
+        before = self._meter_at_start[length]
+        energy = None if before is None or self._meter is None else max(self._meter - before, 0.0)
+        self._closed[length].append({
+            "start": self._starts[length],
+            "windows": self._windows[length],
+            "energy": energy,
+            "meter_reading": self._meter,
+        })
+
+    def last_mean(self, key):
+        """Return the mean of key in the last closed minute, or None."""
+        if not self.minute or (window := self.minute[-1]["windows"].get(key)) is None:
+            return None
+        return round(window.mean, 2)
+
+    def pop_hours(self):
+        """Return and forget the closed hours."""
+        hours = list(self.hours)
+        self.hours.clear()
+        return hours
+
+    def as_dict(self):
+        """Return the closed 1 min and 5 min windows."""
+        return {
+            name: [
+                {
+                    "start": closed["start"],
+                    "energy_kwh": closed["energy"],
+                    **{key: window.as_dict() for key, window in closed["windows"].items()},
+                }
+                for closed in windows
+            ]
+            for name, windows in (("minute", self.minute), ("five_minute", self.five_minute))
+        }
+
+
+def statistic_prefix(entry_id):
+    """Return the start of a charger's external statistic IDs, kept when it is renamed."""
+    return f"{DOMAIN}:{slugify(entry_id)}"
+
+
+class EVSEStatistics:
+    """Write hourly min/mean/max and metered energy as external statistics.
+
+    Home Assistant only imports hourly long-term statistics, so one batch
+    with a row per statistic is written when an hour closes. With
+    ``downsample`` set, the analog sensors only write the mean of each
+    closed minute instead of every polled value.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id, name, downsample=False):
+        """Initialize the statistics stage."""
+        self.hass = hass
+        self.name = name
+        self.downsample = downsample
+        self.pipeline = StatisticsPipeline()
+        self._prefix = statistic_prefix(entry_id)
+
+    @callback
+    def async_update(self, data, changed_keys):
+        """Feed a snapshot and return the keys the entities should write."""
+        closed = self.pipeline.add(time.time(), data)
+        if HOUR in closed:
+            self._async_flush()
+        if not self.downsample:
+            return changed_keys
+        changed_keys = changed_keys - STATISTIC_KEYS
+        if MINUTE in closed:
+            changed_keys |= STATISTIC_KEYS
+        return changed_keys
+
+    def value(self, key, data):
+        """Return the value the sensor of an aggregated key shows."""
+        if self.downsample and (mean := self.pipeline.last_mean(key)) is not None:
+            return mean
+        return getattr(data, STATISTIC_FIELDS[key][0])
+
+    @callback
+    def _async_flush(self):
+        """Write the closed hours, one batch per statistic."""
+        hours = self.pipeline.pop_hours()
+        rows = {key: [] for key in STATISTIC_FIELDS}
+        energy = []
+        for hour in hours:
+            start = datetime.fromtimestamp(hour["start"], tz=timezone.utc)
+            for key, window in hour["windows"].items():
+                rows[key].append(StatisticData(
+                    start=start, mean=window.mean, min=window.minimum, max=window.maximum
+                ))
+            if hour["meter_reading"] is not None:
+                # The controller's meter never resets, so it is the running sum
+                energy.append(StatisticData(start=start, state=hour["meter_reading"], sum=hour["meter_reading"]))
+
+        for key, key_rows in rows.items():
+            if key_rows:
+                field, unit = STATISTIC_FIELDS[key]
+                async_add_external_statistics(self.hass, StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=f"{self.name} {field.replace('_', ' ')}",
+                    source=DOMAIN,
+                    statistic_id=f"{self._prefix}_{field}",
+                    unit_of_measurement=unit,
+                ), key_rows)
+        if energy:
+            async_add_external_statistics(self.hass, StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{self.name} metered energy",
+                source=DOMAIN,
+                statistic_id=f"{self._prefix}_metered_energy",
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            ), energy)
+        _LOGGER.debug(f"Wrote {len(hours)} hour(s) of statistics for {self.name}")
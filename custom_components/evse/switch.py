@@ -1,42 +1,35 @@
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-import asyncio
 import logging
 
-from .const import DOMAIN
+from .api import EVSECommandError, EVSEError, EVSETimeoutError
+from .const import DATA_LOAD_MANAGER, DOMAIN
+from .entity import EVSEEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the EVSE switch."""
-    ip = config_entry.data['ip_address']
-    port = config_entry.data['port']
     name = config_entry.data['name']
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    switch = EVSESwitch(hass, f"{name}_switch", ip, port, config_entry.entry_id, config_entry.unique_id)
-    async_add_entities([switch], True)
+    switch = EVSESwitch(hass, coordinator, f"{name}_switch", config_entry.entry_id, config_entry.unique_id)
+    async_add_entities([switch])
 
-class EVSESwitch(SwitchEntity):
+class EVSESwitch(EVSEEntity, SwitchEntity):
     """Representation of an EVSE switch."""
 
-    def __init__(self, hass, name, ip, port, entry_id, unique_id):
+    _watched_keys = ("evseState",)
+
+    def __init__(self, hass, coordinator, name, entry_id, unique_id):
         """Initialize the switch."""
+        super().__init__(coordinator, entry_id)
         self.hass = hass
         self._name = name
-        self._ip = ip
-        self._port = port
-        self._state = None
+        self._state = bool(coordinator.tracker.value("evseState", coordinator.data))
         self._available = True
+        self._failed_snapshot = None
         self._unique_id = f"{unique_id}_switch"
         self._attr_extra_state_attributes = {}
-        self._entry_id = entry_id
-
-    @property
-    def device_info(self):
-        """Return device information."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-        }
 
     @property
     def name(self):
@@ -56,84 +49,71 @@ class EVSESwitch(SwitchEntity):
     @property
     def available(self):
         """Return True if entity is available."""
-        return self._available
+        return self._available and super().available
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
-        await self._send_command("setStatus?active=true")
+        await self._send_command(True)
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
-        await self._send_command("setStatus?active=false")
-
-    async def _send_command(self, command):
-        """Send command to EVSE and update state."""
-        url = f"http://{self._ip}:{self._port}/{command}"
+        await self._send_command(False)
+
+    async def _send_command(self, active):
+        """Send command to EVSE, the tracker shows the new state until a snapshot confirms it."""
+        url = self.coordinator.client.url(f"setStatus?active={'true' if active else 'false'}")
+        # Switched off by hand, the charger stays off until switched on again
+        await self.hass.data[DOMAIN][DATA_LOAD_MANAGER].async_set_user_enabled(
+            [self.coordinator.config_entry.entry_id], active
+        )
         try:
-            session = async_get_clientsession(self.hass)
-            async with asyncio.timeout(10):
-                async with session.get(url) as response:
-                    response_text = await response.text()
-                    if response_text.startswith("S0_"):
-                        if "activated" in response_text.lower():
-                            _LOGGER.info(f"EVSE successfully activated: {response_text}")
-                            self._state = True
-                        elif "deactivated" in response_text.lower():
-                            _LOGGER.info(f"EVSE successfully deactivated: {response_text}")
-                            self._state = False
-                        else:
-                            _LOGGER.info(f"EVSE command successful, but state unclear: {response_text}")
-                            self._state = "true" in command  # Fallback to the original logic
-                    
-                        self._available = True
-                        self.async_write_ha_state()  # Immediately update the state
-                    
-                        # Schedule a delayed update to confirm the state
-                        self.hass.loop.call_later(10, lambda: asyncio.create_task(self._delayed_update()))
-                    elif response_text.startswith("E0_"):
-                        _LOGGER.error(f"Internal error: {response_text}")
-                        self._available = False
-                    elif response_text.startswith("E1_"):
-                        _LOGGER.error(f"Invalid value error: {response_text}")
-                    elif response_text.startswith("E2_"):
-                        _LOGGER.error(f"Wrong parameter error: {response_text}")
-                    elif response_text.startswith("E3_"):
-                        _LOGGER.warning(f"EVSE state unchanged: {response_text}")
-                        self._state = "activate" in response_text
-                    else:
-                        _LOGGER.error(f"Unexpected response: {response_text}")
-                        self._available = False
-        except asyncio.TimeoutError:
+            response_text = await self.coordinator.commands.set_status(active)
+            _LOGGER.info(f"EVSE {'activated' if active else 'deactivated'}: {response_text}")
+            self._available = True
+            self.coordinator.async_boost()
+        except EVSECommandError as e:
+            response_text = e.response_text
+            if e.code == "E0":
+                _LOGGER.error(f"Internal error: {response_text}")
+                self._available = False
+            elif e.code == "E1":
+                _LOGGER.error(f"Invalid value error: {response_text}")
+            elif e.code == "E2":
+                _LOGGER.error(f"Wrong parameter error: {response_text}")
+            elif e.code == "E3":
+                # The controller already is in the requested state
+                _LOGGER.warning(f"EVSE state unchanged: {response_text}")
+                self.coordinator.tracker.expect("evseState", active)
+                self._available = True
+            else:
+                _LOGGER.error(f"Unexpected response: {response_text}")
+                self._available = False
+        except EVSETimeoutError:
             self._available = False
             _LOGGER.error("Timeout error sending command to %s", url)
-        except Exception as e:
+        except EVSEError as e:
             self._available = False
             _LOGGER.error("Error sending command to %s: %s", url, str(e))
-    
-        self.async_write_ha_state()
 
-    async def _delayed_update(self):
-        """Perform a delayed update to confirm the switch state."""
-        await self.async_update()
+        if self._available:
+            self._update_from_data(self.coordinator.data)
+        else:
+            # A failed command shows as unavailable until the next good snapshot
+            self._failed_snapshot = self.coordinator.data
         self.async_write_ha_state()
 
-    async def async_update(self):
-        """Fetch new state data for the switch."""
-        url = f"http://{self._ip}:{self._port}/getParameters"
-        try:
-            session = async_get_clientsession(self.hass)
-            async with asyncio.timeout(10):
-                async with session.get(url) as response:
-                    data = await response.json()
-                    evse_state = data["list"][0].get("evseState")
-                    new_state = evse_state == "true" or evse_state is True
-                    if new_state != self._state:
-                        _LOGGER.info(f"Switch state mismatch. Updated from {self._state} to {new_state}")
-                        self._state = new_state
+    def _snapshot_changed(self):
+        """Also correct an error the controller recovered from."""
+        if not self._available and self._recovered(self.coordinator.data):
+            return True
+        return super()._snapshot_changed()
+
+    def _update_from_data(self, data):
+        """Take the switch state from the tracker or the shared parameter snapshot."""
+        self._state = bool(self.coordinator.tracker.value("evseState", data))
+        if self._recovered(data):
             self._available = True
-        except asyncio.TimeoutError:
-            self._available = False
-            _LOGGER.error("Timeout error fetching data from %s", url)
-        except Exception as e:
-            self._available = False
-            _LOGGER.error("Error fetching data from %s: %s", url, str(e))
+
+    def _recovered(self, data):
+        """Return True if a good snapshot arrived after the last failed command."""
+        return self.coordinator.last_update_success and data is not self._failed_snapshot
@@ -0,0 +1,15 @@
+"""Make the integration importable as "evse" from the tools.
+
+Registers custom_components/evse as a bare package, so its pure modules
+import without Home Assistant installed and without running the
+integration's __init__. Import this before any "evse" module.
+"""
+import pathlib
+import sys
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+_evse = types.ModuleType("evse")
+_evse.__path__ = [str(ROOT / "custom_components" / "evse")]
+sys.modules.setdefault("evse", _evse)
@@ -0,0 +1,169 @@
+"""Load benchmark of the polling pipeline against simulated controllers.
+
+Starts N fake SimpleEVSE-WiFi controllers in a separate process and polls
+them the way the integration does: one /getParameters per charger and
+cycle through a pooled EVSEClient, followed by the snapshot diff that
+decides which entities write their state. The ``legacy`` architecture
+repeats the old behaviour of one request through a new session per entity
+and a state write for every entity on every cycle, so both can be compared:
+
+    python tools/benchmark.py --chargers 50 --cycles 10
+    python tools/benchmark.py --chargers 50 --cycles 10 --architecture legacy
+
+Home Assistant itself is not needed. The state writes are counted, not
+performed, so the loop time covers HTTP, JSON parsing and change detection.
+"""
+import argparse
+import asyncio
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import aiohttp
+
+from _evse_path import ROOT
+
+from evse.api import EVSEClient, EVSEError  # noqa: E402
+from evse.delta import SnapshotDiffer, deadbands_from_options  # noqa: E402
+
+ARCHITECTURES = ("coordinator", "legacy")
+
+# Snapshot keys shown by each entity of one charger
+ENTITY_KEYS = [
+    (key,)
+    for key in (
+        "actualCurrent", "actualPower", "duration", "vehicleState", "maxCurrent",
+        "actualCurrentMA", "alwaysActive", "lastActionUser", "lastActionUID", "energy",
+        "mileage", "meterReading", "currentP1", "currentP2", "currentP3",
+        "voltageP1", "voltageP2", "voltageP3", "useMeter", "RFIDUID",
+    )
+] + [("evseState",), ("evseState",), ("actualCurrent", "maxCurrent")]
+
+
+class _Charger:
+    """Client side of one benchmarked charger."""
+
+    def __init__(self, port):
+        """Initialize the pipeline of one charger."""
+        self.port = port
+        self.client = EVSEClient("127.0.0.1", port)
+        self.differ = SnapshotDiffer(deadbands_from_options({}))
+        self.requests = 0
+        self.failures = 0
+
+    async def poll(self):
+        """Poll once like the coordinator and return the state writes."""
+        self.requests += 1
+        try:
+            data = await self.client.get_parameters()
+        except EVSEError:
+            self.failures += 1
+            return 0
+        changed = self.differ.diff(data)
+        return sum(1 for keys in ENTITY_KEYS if not changed.isdisjoint(keys))
+
+    async def poll_legacy(self):
+        """Poll once per entity through a new session and return the state writes."""
+        url = f"http://127.0.0.1:{self.port}/getParameters"
+
+        async def fetch():
+            self.requests += 1
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with asyncio.timeout(10):
+                        async with session.get(url) as response:
+                            (await response.json())["list"][0]
+            except Exception:
+                self.failures += 1
+
+        await asyncio.gather(*(fetch() for _ in ENTITY_KEYS))
+        return len(ENTITY_KEYS)
+
+
+def _start_fakes(args):
+    """Start the fake controllers and return the process and their ports."""
+    command = [
+        sys.executable, str(ROOT / "tools" / "fake_evse.py"),
+        "--port", "0", "--count", str(args.chargers), "--vehicle-state", "2",
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--failure-rate", str(args.failure_rate),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    ports = []
+    while len(ports) < args.chargers:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("fake controllers exited during start")
+        ports.append(int(re.search(r":(\d+)$", line.strip()).group(1)))
+    return process, ports
+
+
+async def _run(args, ports):
+    """Poll all chargers for the requested cycles and return the results."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    chargers = [_Charger(port) for port in ports]
+    legacy = args.architecture == "legacy"
+
+    cpu_times = []
+    writes = 0
+    start = time.monotonic()
+    for cycle in range(args.cycles):
+        cycle_start = time.monotonic()
+        cpu_start = time.process_time()
+        results = await asyncio.gather(*(
+            charger.poll_legacy() if legacy else charger.poll() for charger in chargers
+        ))
+        cpu_times.append(time.process_time() - cpu_start)
+        writes += sum(results)
+        if cycle == 0:
+            after = tracemalloc.take_snapshot()
+        await asyncio.sleep(max(0, args.interval - (time.monotonic() - cycle_start)))
+    elapsed = time.monotonic() - start
+
+    memory = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    for charger in chargers:
+        await charger.client.close()
+
+    requests = sum(charger.requests for charger in chargers)
+    cpu_times.sort()
+    return {
+        "architecture": args.architecture,
+        "chargers": len(chargers),
+        "cycles": args.cycles,
+        "requests_per_cycle": round(requests / args.cycles, 1),
+        "failed_requests": sum(charger.failures for charger in chargers),
+        "loop_cpu_ms_per_cycle_p50": round(cpu_times[len(cpu_times) // 2] * 1000, 2),
+        "loop_cpu_ms_per_cycle_max": round(cpu_times[-1] * 1000, 2),
+        "state_writes_per_second": round(writes / elapsed, 1),
+        "memory_kib_per_charger": round(memory / len(chargers) / 1024, 1),
+    }
+
+
+def main():
+    """Parse the command line, run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chargers", type=int, default=50)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds per poll cycle")
+    parser.add_argument("--architecture", choices=ARCHITECTURES, default="coordinator")
+    parser.add_argument("--latency", type=float, default=20, help="controller latency in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="controller jitter in ms")
+    parser.add_argument("--failure-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    process, ports = _start_fakes(args)
+    try:
+        results = asyncio.run(_run(args, ports))
+    finally:
+        process.terminate()
+        process.wait()
+    for key, value in results.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
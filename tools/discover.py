@@ -0,0 +1,55 @@
+"""Search a subnet for controllers the way the config flow's scan step does.
+
+Probes /getParameters on every address of the subnet with the same bounded
+pool and timeout, and prints the controllers found with the MAC address the
+kernel's ARP table holds for them. Against simulated controllers, which can
+listen on any loopback address:
+
+    python tools/fake_evse.py --host 127.0.0.5 --port 8080 &
+    python tools/fake_evse.py --host 127.0.0.9 --port 8080 --count 2 &
+    python tools/discover.py 127.0.0.0/24 --port 8080 --port 8081
+"""
+import argparse
+import asyncio
+import time
+
+import _evse_path  # noqa: F401, registers the "evse" package
+
+from evse.const import DISCOVERY_CONCURRENCY, DISCOVERY_TIMEOUT  # noqa: E402
+from evse.discovery import async_scan, read_arp_table, subnet_hosts  # noqa: E402
+
+
+async def _run(args):
+    """Scan and print the controllers found."""
+    hosts = subnet_hosts(args.subnet)
+    ports = args.port or [80]
+    start = time.perf_counter()
+    found = await async_scan(hosts, ports, concurrency=args.concurrency, timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+    table = read_arp_table()
+    for charger in sorted(found, key=lambda charger: (charger.host, charger.port)):
+        data = charger.parameters
+        print(
+            f"{charger.host}:{charger.port}  mac={table.get(charger.host, '-')}  "
+            f"vehicle={data.vehicle_state_name}  max_current={data.max_current}"
+        )
+    print(f"{len(found)} controllers, {len(hosts) * len(ports)} probes in {elapsed:.2f} s")
+
+
+def main():
+    """Parse the command line and scan."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("subnet", help="e.g. 192.168.1.0/24")
+    parser.add_argument("--port", type=int, action="append", help="port to probe, repeatable (default 80)")
+    parser.add_argument("--concurrency", type=int, default=DISCOVERY_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=DISCOVERY_TIMEOUT, help="seconds per probe")
+    args = parser.parse_args()
+    try:
+        subnet_hosts(args.subnet)
+    except ValueError as e:
+        parser.error(str(e))
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
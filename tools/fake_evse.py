@@ -0,0 +1,300 @@
+"""Simulated SimpleEVSE-WiFi controller for offline development.
+
+Serves /getParameters, /getLog, /setCurrent, /setStatus and the /ws status
+socket with the same JSON and S0_/E0_..E3_ responses as the real firmware. Point
+an EVSE config entry at the printed address to try the integration
+without a wallbox:
+
+    python tools/fake_evse.py --port 8080
+
+Latency, jitter and failures can be injected to see how the integration
+copes with a slow or flaky controller:
+
+    python tools/fake_evse.py --latency 150 --jitter 100 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import WSMsgType, web
+
+VOLTAGE = 230.0
+
+FAILURE_HTTP = "http"
+FAILURE_TIMEOUT = "timeout"
+FAILURE_INTERNAL = "internal"
+FAILURE_MODES = (FAILURE_HTTP, FAILURE_TIMEOUT, FAILURE_INTERNAL)
+
+
+class FakeEVSE:
+    """State and HTTP handlers of one simulated controller."""
+
+    def __init__(
+        self,
+        max_current=32,
+        phases=3,
+        vehicle_state=1,
+        latency=0.0,
+        jitter=0.0,
+        failure_rate=0.0,
+        failure_mode=FAILURE_HTTP,
+        seed=None,
+    ):
+        """Initialize the simulated controller.
+
+        latency and jitter are in seconds, failure_rate is the fraction of
+        HTTP requests that fail in the given failure_mode.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.failures = 0
+        self._random = random.Random(seed)
+        self.max_current = max_current
+        self.phases = phases
+        self.vehicle_state = vehicle_state
+        self.active = False
+        self.current = 16
+        self.meter_reading = 1000.0
+        self.energy = 0.0
+        self.session_start = None
+        self.log = []
+        self.requests = 0
+        self._last_tick = time.monotonic()
+        self._sockets = set()
+        self._runner = None
+
+    def tick(self):
+        """Advance the simulated meter to now."""
+        now = time.monotonic()
+        power = self.power
+        if power:
+            kwh = power * (now - self._last_tick) / 3600
+            self.energy += kwh
+            self.meter_reading += kwh
+        self._last_tick = now
+
+    @property
+    def charging(self):
+        """Return True while the simulated car draws current."""
+        return self.active and self.vehicle_state in (2, 3)
+
+    @property
+    def power(self):
+        """Return the charging power in kW."""
+        return round(self.current * VOLTAGE * self.phases / 1000, 2) if self.charging else 0.0
+
+    def _voltage(self):
+        """Return a phase voltage with a little measurement noise."""
+        return round(VOLTAGE + self._random.uniform(-0.5, 0.5), 1)
+
+    def parameters(self):
+        """Return the /getParameters list entry."""
+        self.tick()
+        phase_current = self.current if self.charging else 0
+        return {
+            "vehicleState": 3 if self.charging else self.vehicle_state,
+            "evseState": self.active,
+            "maxCurrent": self.max_current,
+            "actualCurrent": self.current,
+            "actualCurrentMA": self.current * 1000,
+            "actualPower": self.power,
+            "duration": int((time.monotonic() - self.session_start) * 1000) if self.session_start else 0,
+            "alwaysActive": False,
+            "lastActionUser": "GUI",
+            "lastActionUID": "GUI",
+            "energy": round(self.energy, 2),
+            "mileage": round(self.energy * 6.5, 1),
+            "meterReading": round(self.meter_reading, 2),
+            "currentP1": phase_current,
+            "currentP2": phase_current if self.phases > 1 else 0,
+            "currentP3": phase_current if self.phases > 2 else 0,
+            "voltageP1": self._voltage(),
+            "voltageP2": self._voltage(),
+            "voltageP3": self._voltage(),
+            "useMeter": True,
+            "RFIDUID": "",
+        }
+
+    def status_frame(self):
+        """Return the "getevsedata" WebSocket message."""
+        params = self.parameters()
+        return {
+            "command": "getevsedata",
+            "evse_vehicle_state": params["vehicleState"],
+            "evse_active": params["evseState"],
+            "evse_current_limit": params["actualCurrent"],
+            "evse_current": f"{params['actualPower']:.2f}",
+            "evse_charging_time": params["duration"],
+            "evse_charged_kwh": f"{params['energy']:.2f}",
+            "evse_maximum_current": params["maxCurrent"],
+            "evse_meter_reading": f"{params['meterReading']:.2f}",
+        }
+
+    async def broadcast(self):
+        """Push the status to all connected WebSocket clients."""
+        frame = json.dumps(self.status_frame())
+        for ws in list(self._sockets):
+            await ws.send_str(frame)
+
+    @web.middleware
+    async def _inject(self, request, handler):
+        """Delay requests and make some of them fail."""
+        if request.path == "/ws":
+            return await handler(request)
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.requests += 1
+            self.failures += 1
+            if self.failure_mode == FAILURE_TIMEOUT:
+                # Hang like an overloaded ESP8266 until the client gives up
+                await asyncio.sleep(3600)
+            if self.failure_mode == FAILURE_INTERNAL and request.path != "/getParameters":
+                return web.Response(text="E0_could not process - internal error")
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    async def handle_get_parameters(self, request):
+        """Handle /getParameters."""
+        self.requests += 1
+        return web.json_response({"type": "parameters", "list": [self.parameters()]})
+
+    async def handle_get_log(self, request):
+        """Handle /getLog."""
+        self.requests += 1
+        return web.json_response({"type": "latestlog", "list": self.log})
+
+    async def handle_set_current(self, request):
+        """Handle /setCurrent?current=N."""
+        self.requests += 1
+        if "current" not in request.query:
+            return web.Response(text="E2_could not set current - wrong parameter")
+        try:
+            current = int(request.query["current"])
+        except ValueError:
+            return web.Response(text=f"E1_could not set current - give a value between 6 and {self.max_current}")
+        if not 6 <= current <= self.max_current:
+            return web.Response(text=f"E1_could not set current - give a value between 6 and {self.max_current}")
+        self.tick()
+        self.current = current
+        await self.broadcast()
+        return web.Response(text="S0_set current to given value")
+
+    async def handle_set_status(self, request):
+        """Handle /setStatus?active=true|false."""
+        self.requests += 1
+        if "active" not in request.query:
+            return web.Response(text="E2_could not process - wrong parameter")
+        value = request.query["active"]
+        if value not in ("true", "false"):
+            return web.Response(text="E1_could not process - give a valid value (true/false)")
+        active = value == "true"
+        if active == self.active:
+            if active:
+                return web.Response(text="E3_could not activate EVSE - EVSE already activated!")
+            return web.Response(text="E3_could not deactivate EVSE - EVSE already deactivated!")
+        self.tick()
+        if not active and self.session_start is not None:
+            self.log.append({
+                "uid": "GUI",
+                "username": "GUI",
+                "timestamp": int(time.time()),
+                "duration": int((time.monotonic() - self.session_start) * 1000),
+                "energy": round(self.energy, 2),
+                "reading": round(self.meter_reading, 2),
+            })
+            self.energy = 0.0
+        self.active = active
+        self.session_start = time.monotonic() if active else None
+        await self.broadcast()
+        return web.Response(text="S0_EVSE successfully activated" if active else "S0_EVSE successfully deactivated")
+
+    async def handle_ws(self, request):
+        """Handle the /ws status socket."""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT and msg.json().get("command") == "getevsedata":
+                    await ws.send_json(self.status_frame())
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    def app(self):
+        """Return the aiohttp application of this controller."""
+        app = web.Application(middlewares=[self._inject])
+        app.router.add_get("/getParameters", self.handle_get_parameters)
+        app.router.add_get("/getLog", self.handle_get_log)
+        app.router.add_get("/setCurrent", self.handle_set_current)
+        app.router.add_get("/setStatus", self.handle_set_status)
+        app.router.add_get("/ws", self.handle_ws)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serve the controller and return the bound port."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop serving."""
+        for ws in list(self._sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    """Run simulated controllers until interrupted."""
+    chargers = []
+    for index in range(args.count):
+        fake = FakeEVSE(
+            max_current=args.max_current,
+            phases=args.phases,
+            vehicle_state=args.vehicle_state,
+            latency=args.latency / 1000,
+            jitter=args.jitter / 1000,
+            failure_rate=args.failure_rate,
+            failure_mode=args.failure_mode,
+        )
+        port = await fake.start(args.host, args.port + index if args.port else 0)
+        chargers.append(fake)
+        print(f"Fake EVSE {index + 1} listening on http://{args.host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for fake in chargers:
+            await fake.stop()
+
+
+def main():
+    """Parse the command line and serve."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="first port, 0 picks free ports")
+    parser.add_argument("--count", type=int, default=1, help="number of controllers")
+    parser.add_argument("--max-current", type=int, default=32)
+    parser.add_argument("--phases", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--vehicle-state", type=int, default=2, choices=(1, 2, 3, 5))
+    parser.add_argument("--latency", type=float, default=0, help="response delay in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random delay spread in ms")
+    parser.add_argument("--failure-rate", type=float, default=0, help="fraction of failing requests")
+    parser.add_argument("--failure-mode", choices=FAILURE_MODES, default=FAILURE_HTTP)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
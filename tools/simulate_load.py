@@ -0,0 +1,87 @@
+"""Offline simulation of the load balancing allocator.
+
+Runs the allocator of the integration against a synthetic fleet with
+random arrivals and a varying house load, checks that no step exceeds the
+supply or hands out less than the minimum charging current and reports
+the solver time:
+
+    python tools/simulate_load.py --chargers 100 --steps 2000
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+import _evse_path  # noqa: F401, registers the "evse" package
+
+from evse.allocation import MODE_FAIR_SHARE, MODE_PRIORITY, ChargerDemand, allocate  # noqa: E402
+from evse.const import MIN_CHARGING_CURRENT  # noqa: E402
+
+
+def simulate(chargers, steps, supply, mode, seed):
+    """Run the simulation and return a dict of results."""
+    rng = random.Random(seed)
+    fleet = [
+        ChargerDemand(f"charger_{index}", rng.choice((16, 20, 32)), rng.randint(0, 3))
+        for index in range(chargers)
+    ]
+    connected = set()
+    timings = []
+    violations = 0
+    served = paused = 0
+    for step in range(steps):
+        for charger in fleet:
+            if charger.entry_id in connected and rng.random() < 0.01:
+                connected.discard(charger.entry_id)
+            elif charger.entry_id not in connected and rng.random() < 0.02:
+                connected.add(charger.entry_id)
+        house_load = supply * (0.3 + 0.2 * math.sin(step / 50))
+        available = supply - house_load
+        demands = [c for c in fleet if c.entry_id in connected]
+
+        start = time.perf_counter()
+        allocation = allocate(demands, available, mode)
+        timings.append(time.perf_counter() - start)
+
+        maximum = {c.entry_id: c.max_current for c in demands}
+        if sum(allocation.values()) > available + 1e-9:
+            violations += 1
+        for entry_id, current in allocation.items():
+            if current and not MIN_CHARGING_CURRENT <= current <= maximum[entry_id]:
+                violations += 1
+            if current:
+                served += 1
+            else:
+                paused += 1
+        for charger in demands:
+            charger.charging = allocation[charger.entry_id] > 0
+
+    timings.sort()
+    return {
+        "steps": steps,
+        "violations": violations,
+        "served_charger_steps": served,
+        "paused_charger_steps": paused,
+        "solve_p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "solve_max_us": round(timings[-1] * 1e6, 1),
+    }
+
+
+def main():
+    """Parse the command line and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chargers", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--supply", type=float, default=400, help="shared supply in A per phase")
+    parser.add_argument("--mode", choices=(MODE_FAIR_SHARE, MODE_PRIORITY), default=MODE_FAIR_SHARE)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    results = simulate(args.chargers, args.steps, args.supply, args.mode, args.seed)
+    for key, value in results.items():
+        print(f"{key}: {value}")
+    return 1 if results["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
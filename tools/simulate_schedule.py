@@ -0,0 +1,174 @@
+"""Offline simulation of the smart charging planner.
+
+Plans a charge against synthetic tariffs or PV surplus curves, checks that
+the plan delivers the target energy before the deadline within the
+charger's limits and compares its cost and command count with charging
+right away. Forecast updates are simulated by perturbing the remaining
+prices and re-planning from the energy still missing:
+
+    python tools/simulate_schedule.py --tariff spot --energy 40 --hours 14
+    python tools/simulate_schedule.py --tariff solar --mode surplus --energy 20
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+import _evse_path  # noqa: F401, registers the "evse" package
+
+from evse.const import MIN_CHARGING_CURRENT  # noqa: E402
+from evse.planner import (  # noqa: E402
+    MODE_PRICE,
+    MODE_SURPLUS,
+    ForecastSlot,
+    PlanStep,
+    kw_per_ampere,
+    plan_cost,
+    plan_price,
+    plan_surplus,
+)
+
+TARIFFS = ("flat", "day_night", "spot", "solar")
+
+
+def synthetic_slots(tariff, hours, slot_minutes, rng):
+    """Return forecast slots starting at 0 for the given synthetic tariff."""
+    slots = []
+    length = slot_minutes * 60
+    for index in range(int(hours * 60 / slot_minutes)):
+        start = index * length
+        hour = (18 + start / 3600) % 24  # the horizon starts in the evening
+        if tariff == "flat":
+            value = 0.30
+        elif tariff == "day_night":
+            value = 0.22 if hour >= 22 or hour < 6 else 0.34
+        elif tariff == "spot":
+            value = 0.25 + 0.08 * math.sin((hour - 3) / 24 * 2 * math.pi) + rng.uniform(-0.04, 0.04)
+        else:
+            # PV surplus in kW, a bell between 7:00 and 19:00 with clouds
+            sun = math.sin((hour - 7) / 12 * math.pi) if 7 <= hour <= 19 else 0.0
+            value = max(0.0, 9 * sun * rng.uniform(0.6, 1.0) - 0.5)
+        slots.append(ForecastSlot(start, start + length, round(value, 4)))
+    return slots
+
+
+def commands(plan):
+    """Return the setStatus and setCurrent commands a plan needs."""
+    count = 0
+    previous = 0
+    previous_end = None
+    for step in sorted(plan, key=lambda step: step.start):
+        if previous and step.start > previous_end:
+            # Gap in the plan: the EVSE is switched off until this step
+            count += 1
+            previous = 0
+        if step.current != previous:
+            count += 1 + (previous == 0 and step.current > 0)
+        previous = step.current
+        previous_end = step.end
+    return count + (previous != 0)
+
+
+def check(plan, energy, deadline, max_current, phases):
+    """Return the violations of a plan."""
+    violations = []
+    delivered = sum(s.current * kw_per_ampere(phases) * (s.end - s.start) / 3600 for s in plan)
+    if delivered + 1e-6 < energy:
+        violations.append(f"delivers {delivered:.2f} of {energy} kWh")
+    for step in plan:
+        if step.end > deadline:
+            violations.append(f"step ends after the deadline: {step}")
+        if step.current and not MIN_CHARGING_CURRENT <= step.current <= max_current:
+            violations.append(f"current out of range: {step}")
+    return violations
+
+
+def simulate(args):
+    """Plan, re-plan after forecast updates and return the results."""
+    rng = random.Random(args.seed)
+    deadline = args.hours * 3600
+    slots = synthetic_slots(args.tariff, args.hours, args.slot_minutes, rng)
+    planner = plan_surplus if args.mode == MODE_SURPLUS else plan_price
+
+    start = time.perf_counter()
+    plan, missing = planner(slots, args.energy, 0, deadline, args.max_current, args.phases)
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    # Forecast updates: execute up to the update, then re-plan the rest
+    executed = []
+    now = 0
+    remaining = args.energy
+    replans = []
+    for update in range(1, args.updates + 1):
+        until = deadline * update / (args.updates + 1)
+        for step in plan:
+            if step.start < until and step.end > now:
+                part = PlanStep(max(step.start, now), min(step.end, until), step.current)
+                executed.append(part)
+                remaining -= part.current * kw_per_ampere(args.phases) * (part.end - part.start) / 3600
+        now = until
+        slots = [
+            ForecastSlot(s.start, s.end, max(0.0, s.value * rng.uniform(0.9, 1.1))) if s.start >= now else s
+            for s in slots
+        ]
+        start = time.perf_counter()
+        plan, missing = planner(slots, max(remaining, 0.0), now, deadline, args.max_current, args.phases)
+        replans.append((time.perf_counter() - start) * 1000)
+    final = executed + plan
+
+    immediate = [PlanStep(0, args.energy / (args.max_current * kw_per_ampere(args.phases)) * 3600, args.max_current)]
+    results = {
+        "tariff": args.tariff,
+        "mode": args.mode,
+        "slots": len(slots),
+        "solve_ms": round(solve_ms, 3),
+        "replan_ms_max": round(max(replans), 3) if replans else None,
+        "missing_kwh": round(missing, 3),
+        "violations": check(final, args.energy, deadline, args.max_current, args.phases),
+        "commands": commands(final),
+    }
+    if args.mode == MODE_PRICE:
+        energy, cost = plan_cost(final, slots, args.phases)
+        _, immediate_cost = plan_cost(immediate, slots, args.phases)
+        results.update({
+            "energy_kwh": round(energy, 2),
+            "cost": round(cost, 2),
+            "cost_charging_now": round(immediate_cost, 2),
+        })
+    else:
+        grid = 0.0
+        for step in final:
+            for slot in slots:
+                overlap = min(step.end, slot.end) - max(step.start, slot.start)
+                if overlap > 0:
+                    drawn = step.current * kw_per_ampere(args.phases)
+                    grid += max(drawn - slot.value, 0.0) * overlap / 3600
+        results["grid_kwh"] = round(grid, 2)
+    return results
+
+
+def main():
+    """Parse the command line, run the simulation and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tariff", choices=TARIFFS, default="spot")
+    parser.add_argument("--mode", choices=(MODE_PRICE, MODE_SURPLUS), default=MODE_PRICE)
+    parser.add_argument("--energy", type=float, default=40, help="target energy in kWh")
+    parser.add_argument("--hours", type=float, default=14, help="hours until the deadline")
+    parser.add_argument("--slot-minutes", type=int, default=15)
+    parser.add_argument("--max-current", type=int, default=16)
+    parser.add_argument("--phases", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--updates", type=int, default=3, help="forecast updates during the charge")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.tariff == "solar" and args.mode == MODE_PRICE:
+        parser.error("the solar curve is a PV surplus, use --mode surplus")
+
+    results = simulate(args)
+    for key, value in results.items():
+        print(f"{key}: {value}")
+    return 1 if results["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())